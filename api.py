@@ -1,7 +1,15 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import ollama
+
+from app.batching import BATCHING_ENABLED, MicroBatcher
+from app.lite import LITE_ENGINE
+from app.llm import ollama_post
+from app.prompts import SIMPLIFY_FLE, PromptTooLong, check_budget
+from app.routing import choose_model, routed_models
+from app.telemetry import RequestIdMiddleware, render_metrics
+from app.warmup import readiness, start_warmup
 
 app = FastAPI()
 
@@ -9,11 +17,42 @@ app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+# Tag every request with an id (X-Request-ID) used in the LLM call logs
+app.add_middleware(RequestIdMiddleware)
+
+
 class SimplifyRequest(BaseModel):
     text: str
     target_level: str | None = None  # "A1"–"C1" or None
 
 
+# Level given to the prompts when the client did not choose one
+NO_TARGET_LEVEL = "non précisé"
+
+
+def simplify_fle(text, target_level, model, deadline=None, cancel=None):
+    """One generation with SIMPLIFY_FLE; raises if Ollama cannot answer."""
+    # Fixed instructions first, then the level and the text (prompt-cache friendly)
+    response = ollama_post(
+        "/api/chat",
+        {
+            "model": model,
+            "messages": SIMPLIFY_FLE.chat_messages(target_level=target_level, text=text),
+            "stream": False,
+        },
+        deadline=deadline,
+        cancel=cancel,
+        target_level=target_level,
+        prompt_template=SIMPLIFY_FLE.id,
+    )
+    return response["message"]["content"]
+
+
+# Optional micro-batching (EDUSIMPLIFY_LLM_BATCHING=1): short texts of the
+# same level and model share one generation, the rest go through simplify_fle
+batcher = MicroBatcher(simplify_fle) if BATCHING_ENABLED else None
+
+
 CEFR_EXPLANATIONS = {
     "A1": (
         "A1 level: very short sentences, present tense, concrete everyday words "
@@ -43,6 +82,27 @@ def home():
     return {"message": "EduSimplify API is running"}
 
 
+@app.on_event("startup")
+def warmup_models():
+    start_warmup(routed_models(), spacy_pipelines=not LITE_ENGINE)
+
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics())
+
+
 @app.post("/simplify")
 def simplify_text(req: SimplifyRequest):
     text = req.text
@@ -55,36 +115,18 @@ def simplify_text(req: SimplifyRequest):
             "cefr_explanation": "Empty text, no CEFR evaluation.",
         }
 
-    # Build the prompt dynamically: with or without target CEFR level
-    if target_level:
-        system_prompt = (
-            f"Tu es un expert en FLE. Simplifie le texte suivant pour un niveau {target_level} du CECR.\n"
-            "Règles :\n"
-            "- Ne change pas le sens.\n"
-            "- Utilise des phrases simples.\n"
-            "- Utilise un vocabulaire adapté au niveau cible.\n"
-            "- N’ajoute pas d’informations.\n"
-            "Donne uniquement la version simplifiée."
-        )
-    else:
-        system_prompt = (
-            "Tu es un expert en FLE. Simplifie le texte suivant pour un public d'apprenants.\n"
-            "Règles :\n"
-            "- Ne change pas le sens.\n"
-            "- Utilise des phrases plus simples.\n"
-            "- Réduis les tournures trop complexes.\n"
-            "- N’ajoute pas d’informations.\n"
-            "Donne uniquement la version simplifiée."
-        )
+    try:
+        check_budget(text, target_level)
+    except PromptTooLong as e:
+        return JSONResponse({"detail": str(e)}, status_code=413)
 
     try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[
-                {"role": "user", "content": f"{system_prompt}\n\nTexte : {text}"},
-            ],
-        )
-        simplified = response["message"]["content"]
+        model, routing_reason = choose_model(text, target_level)
+        level = target_level or NO_TARGET_LEVEL
+        if batcher is not None:
+            simplified = batcher.submit(text, level, model)
+        else:
+            simplified = simplify_fle(text, level, model)
 
         # Explanation for the chosen level (or generic explanation)
         if target_level and target_level in CEFR_EXPLANATIONS:
@@ -101,6 +143,8 @@ def simplify_text(req: SimplifyRequest):
             "simplified_text": simplified,
             "target_level": target_level,
             "cefr_explanation": expl,
+            "model": model,
+            "routing_reason": routing_reason,
         }
 
     except Exception as e:
@@ -0,0 +1,221 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Optional, Union
+
+from .backends import RequestCancelled
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Nombre maximal de requêtes en attente d'un créneau LLM
+ADMISSION_QUEUE_SIZE = int(os.environ.get("EDUSIMPLIFY_QUEUE_SIZE", "32"))
+
+# Délai total (secondes) accordé à une requête, attente comprise
+REQUEST_DEADLINE = float(os.environ.get("EDUSIMPLIFY_REQUEST_DEADLINE", "60"))
+
+# Valeur de l'en-tête Retry-After renvoyé en cas de saturation
+RETRY_AFTER = int(os.environ.get("EDUSIMPLIFY_RETRY_AFTER", "5"))
+
+# Fréquence (secondes) de vérification de la déconnexion du client
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+class Overloaded(Exception):
+    """
+    Le serveur est saturé : 429 si la file est pleine, 503 si le délai
+    a expiré dans la file. `retry_after` alimente l'en-tête Retry-After.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: int = RETRY_AFTER):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class ClientDisconnected(Exception):
+    """Le client a fermé la connexion avant la fin du traitement."""
+
+
+# -------------------------------------------------
+# 1. CONTRÔLE D'ADMISSION
+# -------------------------------------------------
+
+class AdmissionController:
+    """
+    Limite le nombre de générations LLM simultanées et la taille de la file
+    d'attente. Au-delà, les requêtes sont refusées immédiatement au lieu
+    d'attendre un backend déjà saturé.
+
+    `max_inflight` peut être un entier ou une fonction (ex: pool.capacity),
+    ce qui adapte la capacité au nombre de backends disponibles.
+    Chaque génération occupe un créneau ; un lot (micro-batching) n'en
+    prend qu'un pour tous ses textes.
+
+    Le contrôleur vit dans la boucle asyncio de l'application : depuis un
+    thread de travail, on passe par `thread_slot`, une fois la boucle
+    attachée avec `attach`.
+    """
+
+    def __init__(
+        self,
+        max_inflight: Union[int, Callable[[], int]],
+        max_queue: int = ADMISSION_QUEUE_SIZE,
+        retry_after: int = RETRY_AFTER,
+    ):
+        self._capacity = max_inflight if callable(max_inflight) else (lambda: max_inflight)
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Boucle asyncio utilisée par `thread_slot`."""
+        self._loop = loop
+
+    def status(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "queued": len(self._waiters),
+            "capacity": self._capacity(),
+            "max_queue": self.max_queue,
+        }
+
+    @asynccontextmanager
+    async def slot(self, deadline: float):
+        """
+        Réserve un créneau jusqu'à `deadline` (horloge time.monotonic).
+        Lève Overloaded si la file est pleine ou si le délai expire.
+        """
+        await self._acquire(deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def thread_slot(self, deadline: Optional[float] = None, cancel: Optional[threading.Event] = None):
+        """
+        Comme `slot`, depuis un thread de travail : l'attente se fait dans la
+        boucle attachée. `deadline` vaut par défaut REQUEST_DEADLINE à partir
+        de maintenant ; si `cancel` est levé pendant l'attente, la place dans
+        la file est rendue et RequestCancelled est levée.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + REQUEST_DEADLINE
+        asyncio.run_coroutine_threadsafe(self._acquire_unless(deadline, cancel), self._loop).result()
+        try:
+            yield
+        finally:
+            self._loop.call_soon_threadsafe(self._release)
+
+    async def _acquire_unless(self, deadline: float, cancel: Optional[threading.Event]) -> None:
+        if cancel is None:
+            return await self._acquire(deadline)
+        task = asyncio.ensure_future(self._acquire(deadline))
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if cancel.is_set():
+                task.cancel()
+                await asyncio.wait({task})
+                if not task.cancelled() and task.exception() is None:
+                    # créneau obtenu juste avant l'annulation : on le rend
+                    self._release()
+                raise RequestCancelled("Generation cancelled while queued.")
+
+    async def _acquire(self, deadline: float) -> None:
+        capacity = self._capacity()
+        if capacity <= 0:
+            raise Overloaded(503, "No LLM backend available.", self.retry_after)
+
+        if not self._waiters and self.inflight < capacity:
+            self.inflight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            raise Overloaded(429, "Too many requests, queue is full.", self.retry_after)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise Overloaded(503, "Request deadline exceeded while queued.", self.retry_after)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=remaining)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise Overloaded(503, "Request deadline exceeded while queued.", self.retry_after)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # le créneau nous a été attribué entre-temps : on le rend
+            self._release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def _release(self) -> None:
+        self.inflight -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        # attribution dans l'ordre d'arrivée, tant que la capacité le permet
+        capacity = self._capacity()
+        while self._waiters and self.inflight < capacity:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.inflight += 1
+            waiter.set_result(None)
+
+
+# -------------------------------------------------
+# 2. ANNULATION SUR DÉCONNEXION
+# -------------------------------------------------
+
+def _retrieve_result(task: "asyncio.Future[Any]") -> None:
+    # après un abandon, personne ne lit l'issue du thread (RequestCancelled) :
+    # on la consomme pour éviter "Task exception was never retrieved"
+    if not task.cancelled():
+        task.exception()
+
+
+async def run_until_disconnect(request: Any, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Exécute `fn(*args, cancel=event, **kwargs)` dans un thread et surveille
+    la connexion du client (objet Request de Starlette). Si le client se
+    déconnecte, l'événement est levé pour interrompre la génération et
+    ClientDisconnected est levée, une fois le thread terminé : l'appelant
+    garde son créneau d'admission tant que la génération occupe le backend.
+    """
+    cancel = threading.Event()
+    task = asyncio.ensure_future(asyncio.to_thread(fn, *args, cancel=cancel, **kwargs))
+    task.add_done_callback(_retrieve_result)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                cancel.set()
+                await asyncio.wait({task})
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        cancel.set()
+        await asyncio.wait({task})
+        raise
@@ -0,0 +1,360 @@
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+# -------------------------------------------------
+# 0. CONFIGURATION PAR DÉFAUT
+# -------------------------------------------------
+
+# Nombre d'échecs consécutifs avant d'ouvrir le disjoncteur d'un backend
+FAILURE_THRESHOLD = 3
+
+# Durée (secondes) pendant laquelle un backend en échec est écarté
+CIRCUIT_COOLDOWN = 30.0
+
+# Intervalle (secondes) entre deux vérifications de santé actives
+HEALTH_CHECK_INTERVAL = 15.0
+
+# Nombre maximal de générations simultanées par backend
+MAX_INFLIGHT = 4
+
+# Morceaux lus au plus, après une sortie jugée complète (`on_chunk`), en
+# attendant la ligne finale d'Ollama et ses statistiques
+STOP_GRACE_CHUNKS = 64
+
+
+class NoBackendAvailable(RuntimeError):
+    """Aucun backend Ollama n'est disponible (tous en panne ou écartés)."""
+
+
+class RequestCancelled(RuntimeError):
+    """La génération a été abandonnée (client déconnecté)."""
+
+
+class DeadlineExceeded(RequestCancelled):
+    """Le délai accordé à la requête est dépassé."""
+
+
+def _collect_stream(
+    resp: requests.Response,
+    cancel: Optional[threading.Event],
+    deadline: Optional[float],
+    on_chunk: Optional[Callable[[str], bool]] = None,
+) -> Dict[str, Any]:
+    """
+    Lit une réponse Ollama en streaming (NDJSON) et la reconstitue au format
+    non-streamé. Fermer la connexion en cours de lecture arrête la génération
+    côté Ollama : c'est ce qui permet d'annuler un travail devenu inutile.
+    `on_chunk` reçoit chaque morceau de texte ; s'il renvoie True, la sortie
+    est jugée complète et la suite du texte est ignorée. On lit malgré tout
+    jusqu'à la ligne finale (`done`), qui porte les statistiques de
+    génération : avec une sortie contrainte par schéma, elle suit
+    immédiatement. Au-delà de STOP_GRACE_CHUNKS morceaux, on coupe.
+    """
+    parts: List[str] = []
+    message_parts: List[str] = []
+    last: Dict[str, Any] = {}
+    ignored = -1  # morceaux lus après l'arrêt (-1 : pas d'arrêt)
+
+    for line in resp.iter_lines():
+        if cancel is not None and cancel.is_set():
+            raise RequestCancelled("Generation cancelled by caller.")
+        if deadline is not None and time.monotonic() > deadline:
+            raise DeadlineExceeded("Request deadline exceeded during generation.")
+        if not line:
+            continue
+        last = json.loads(line)
+        if ignored >= 0 and not last.get("done"):
+            ignored += 1
+            if ignored > STOP_GRACE_CHUNKS:
+                # le modèle continue après la sortie complète : pas de
+                # statistiques finales, chaque morceau lu = un token généré
+                last["done_reason"] = "client_stop"
+                last["eval_count"] = len(parts) + len(message_parts) + ignored
+                break
+            continue
+        chunk = ""
+        if "response" in last:
+            chunk = last["response"]
+            if ignored < 0:
+                parts.append(chunk)
+        if "message" in last:
+            chunk = last["message"].get("content", "")
+            if ignored < 0:
+                message_parts.append(chunk)
+        if last.get("done"):
+            break
+        if on_chunk is not None and on_chunk(chunk):
+            ignored = 0
+
+    result = dict(last)
+    if parts:
+        result["response"] = "".join(parts)
+    if message_parts:
+        result["message"] = dict(last.get("message") or {}, content="".join(message_parts))
+    return result
+
+
+# -------------------------------------------------
+# 1. BACKEND
+# -------------------------------------------------
+
+class Backend:
+    """
+    Un serveur Ollama et son état : requêtes en cours, échecs consécutifs
+    et disjoncteur (`open_until` > maintenant => backend écarté). Une fois
+    le délai écoulé, le disjoncteur est à demi ouvert : une seule requête
+    d'essai (`probing`) passe, son issue le referme ou le rouvre.
+    """
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.failures = 0
+        self.open_until = 0.0
+        self.healthy = True
+        self.probing = False
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.open_until and not self.probing
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "failures": self.failures,
+            "healthy": self.healthy,
+            "circuit_open": time.monotonic() < self.open_until,
+            "probing": self.probing,
+        }
+
+
+# -------------------------------------------------
+# 2. POOL : ROUTAGE, DISJONCTEUR, BASCULEMENT
+# -------------------------------------------------
+
+class BackendPool:
+    """
+    Répartit les appels Ollama sur plusieurs serveurs :
+    - routage vers le backend ayant le moins de requêtes en cours ;
+    - disjoncteur après `failure_threshold` échecs consécutifs ;
+    - nouvelle tentative sur un autre backend (les générations sont idempotentes) ;
+    - vérifications de santé périodiques (GET /api/version) ;
+    - au plus `max_inflight` générations simultanées par backend.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        failure_threshold: int = FAILURE_THRESHOLD,
+        cooldown: float = CIRCUIT_COOLDOWN,
+        health_interval: float = HEALTH_CHECK_INTERVAL,
+        max_inflight: int = MAX_INFLIGHT,
+    ):
+        if not urls:
+            raise ValueError("BackendPool needs at least one URL.")
+        self.backends = [Backend(u) for u in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.health_interval = health_interval
+        self.max_inflight = max_inflight
+        self._lock = threading.Lock()
+        self._next = 0  # départage à égalité de charge (tourniquet)
+        self._health_thread: Optional[threading.Thread] = None
+
+    # --- Sélection ---
+
+    def acquire(self, exclude: Optional[List[Backend]] = None) -> Backend:
+        """
+        Choisit le backend disponible le moins chargé et incrémente son compteur.
+        Un backend dont le disjoncteur est à demi ouvert reçoit d'abord une
+        seule requête d'essai. Les backends déjà à `max_inflight` ne sont
+        choisis que si tous le sont.
+        Lève NoBackendAvailable si tous sont écartés (disjoncteur ouvert,
+        essai en cours ou vérification de santé en échec).
+        """
+        exclude = exclude or []
+        now = time.monotonic()
+        with self._lock:
+            n = len(self.backends)
+            rotated = [self.backends[(self._next + i) % n] for i in range(n)]
+            self._next = (self._next + 1) % n
+            candidates = [b for b in rotated if b not in exclude]
+            if not candidates:
+                raise NoBackendAvailable("All Ollama backends failed for this request.")
+            available = [b for b in candidates if b.available(now)]
+            if not available:
+                raise NoBackendAvailable("No Ollama backend available (circuits open or unhealthy).")
+            half_open = [b for b in available if b.failures >= self.failure_threshold]
+            closed = [b for b in available if b.failures < self.failure_threshold]
+            not_full = [b for b in closed if b.outstanding < self.max_inflight]
+            if half_open:
+                backend = half_open[0]
+                backend.probing = True
+            else:
+                backend = min(not_full or closed, key=lambda b: b.outstanding)
+            backend.outstanding += 1
+            return backend
+
+    def release(self, backend: Backend, ok: Optional[bool]) -> None:
+        """
+        Rend le backend. `ok` à None (requête annulée, délai dépassé) ne dit
+        rien de sa santé : ni les échecs ni le disjoncteur ne changent.
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            backend.probing = False
+            if ok is None:
+                return
+            if ok:
+                backend.failures = 0
+                backend.open_until = 0.0
+                backend.healthy = True
+            else:
+                backend.failures += 1
+                if backend.failures >= self.failure_threshold:
+                    backend.open_until = time.monotonic() + self.cooldown
+
+    def capacity(self) -> int:
+        """
+        Nombre total de générations simultanées acceptables sur les backends
+        actuellement disponibles (une seule, l'essai, pour un disjoncteur à
+        demi ouvert).
+        """
+        now = time.monotonic()
+        with self._lock:
+            return sum(
+                self.max_inflight if b.failures < self.failure_threshold else 1
+                for b in self.backends
+                if b.available(now)
+            )
+
+    # --- Appels ---
+
+    def post_to(
+        self,
+        backend: Backend,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        on_chunk: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Envoie la requête à un backend donné. Avec un `deadline` (horloge
+        time.monotonic), un événement `cancel` ou un `on_chunk`, la réponse
+        est lue en streaming pour pouvoir interrompre la génération à tout moment.
+        """
+        if deadline is None and cancel is None and on_chunk is None:
+            resp = requests.post(backend.url + path, json=payload, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json()
+
+        body = dict(payload, stream=True)
+        with requests.post(backend.url + path, json=body, timeout=timeout, stream=True) as resp:
+            resp.raise_for_status()
+            return _collect_stream(resp, cancel, deadline, on_chunk)
+
+    def post(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: float,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+        on_chunk: Optional[Callable[[str], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Envoie la requête au backend le moins chargé ; en cas d'erreur réseau
+        ou de réponse 5xx, réessaie sur un autre backend.
+        Les erreurs 4xx (requête invalide) ne sont pas réessayées, pas plus
+        que les annulations et les dépassements de délai : un délai HTTP
+        réduit par `deadline` qui expire lève DeadlineExceeded.
+        """
+        attempts = len(self.backends) if retries is None else retries + 1
+        tried: List[Backend] = []
+        last_error: Optional[Exception] = None
+
+        for _ in range(attempts):
+            call_timeout = timeout
+            capped = False  # le délai d'attente HTTP est celui de la requête
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded("Request deadline exceeded before generation.")
+                capped = remaining < timeout
+                call_timeout = min(timeout, remaining)
+            try:
+                backend = self.acquire(exclude=tried)
+            except NoBackendAvailable:
+                break
+            tried.append(backend)
+            try:
+                data = self.post_to(backend, path, payload, call_timeout, deadline, cancel, on_chunk)
+            except RequestCancelled:
+                # ni un échec ni un succès du backend : son état ne change pas
+                self.release(backend, ok=None)
+                raise
+            except requests.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 500
+                self.release(backend, ok=status < 500)
+                if status < 500:
+                    raise
+                last_error = e
+            except requests.Timeout as e:
+                if capped:
+                    # c'est la requête qui n'a plus le temps, pas le backend
+                    # qui est en panne : ni pénalité ni nouvelle tentative
+                    self.release(backend, ok=None)
+                    raise DeadlineExceeded("Request deadline exceeded during generation.") from e
+                self.release(backend, ok=False)
+                last_error = e
+            except requests.RequestException as e:
+                self.release(backend, ok=False)
+                last_error = e
+            else:
+                self.release(backend, ok=True)
+                return data
+
+        raise last_error or NoBackendAvailable("No Ollama backend available.")
+
+    # --- Santé ---
+
+    def check_health(self) -> None:
+        """
+        Interroge chaque backend ; un backend qui ne répond pas est marqué
+        indisponible jusqu'à la prochaine vérification réussie.
+        """
+        for backend in self.backends:
+            try:
+                requests.get(backend.url + "/api/version", timeout=2).raise_for_status()
+                ok = True
+            except requests.RequestException:
+                ok = False
+            with self._lock:
+                backend.healthy = ok
+                if ok and backend.failures >= self.failure_threshold:
+                    # le serveur répond de nouveau : on referme le disjoncteur
+                    backend.failures = 0
+                    backend.open_until = 0.0
+
+    def start_health_checks(self) -> None:
+        if self._health_thread is not None:
+            return
+
+        def run():
+            while True:
+                self.check_health()
+                time.sleep(self.health_interval)
+
+        self._health_thread = threading.Thread(target=run, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.snapshot() for b in self.backends]
@@ -0,0 +1,357 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+from .backends import DeadlineExceeded, RequestCancelled
+from .llm import ollama_post
+from .prompts import SIMPLIFY_BATCH, SIMPLIFY_JSON_BATCH, PromptTemplate
+from .structured import (
+    BATCH_SCHEMA,
+    JSON_BATCH_SCHEMA,
+    SIMPLIFY_SCHEMA,
+    missing_required,
+    parse_tolerant,
+)
+from .telemetry import batch_request_ids_var, request_id_var
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Active le micro-batching des appels LLM courts
+BATCHING_ENABLED = os.environ.get("EDUSIMPLIFY_LLM_BATCHING", "0") == "1"
+
+# Fenêtre (secondes) pendant laquelle on attend d'autres requêtes
+BATCH_WINDOW = float(os.environ.get("EDUSIMPLIFY_BATCH_WINDOW", "0.02"))
+
+# Nombre maximal de textes par génération
+BATCH_MAX_SIZE = int(os.environ.get("EDUSIMPLIFY_BATCH_MAX_SIZE", "8"))
+
+# Au-delà de ce nombre de mots, un texte est envoyé seul
+BATCH_MAX_WORDS = int(os.environ.get("EDUSIMPLIFY_BATCH_MAX_WORDS", "40"))
+
+# Fréquence (secondes) de vérification du délai et de l'annulation en attente d'un lot
+BATCH_WAIT_POLL = 0.1
+
+
+# -------------------------------------------------
+# 1. FORMATS DE LOT
+# -------------------------------------------------
+
+def _read_text_item(item: Dict[str, Any]) -> Optional[str]:
+    simplified = item.get("simplified")
+    if not isinstance(simplified, str) or not simplified.strip():
+        return None
+    return simplified.strip()
+
+
+def _read_json_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if missing_required(item, SIMPLIFY_SCHEMA):
+        return None
+    return {k: v for k, v in item.items() if k != "index"}
+
+
+class BatchFormat:
+    """
+    Gabarit et schéma d'une génération groupée, et lecture d'un élément de
+    la réponse (None si l'élément est inutilisable).
+    """
+
+    def __init__(
+        self,
+        template: PromptTemplate,
+        schema: Dict[str, Any],
+        read_item: Callable[[Dict[str, Any]], Any],
+    ):
+        self.template = template
+        self.schema = schema
+        self.read_item = read_item
+
+
+# Texte simplifié seul (simplify_with_llm, api.py)
+TEXT_BATCH = BatchFormat(SIMPLIFY_BATCH, BATCH_SCHEMA, _read_text_item)
+
+# Objet SIMPLIFY_SCHEMA complet (main.py)
+JSON_BATCH = BatchFormat(SIMPLIFY_JSON_BATCH, JSON_BATCH_SCHEMA, _read_json_item)
+
+
+# -------------------------------------------------
+# 2. PROMPT GROUPÉ & DÉCODAGE
+# -------------------------------------------------
+
+def build_batch_prompt(
+    texts: List[str], target_level: str, template: PromptTemplate = SIMPLIFY_BATCH
+) -> Dict[str, str]:
+    """
+    Construit les champs `system` et `prompt` d'une génération unique pour
+    plusieurs textes numérotés (consignes fixes, puis niveau et textes).
+    La réponse attendue est un objet JSON {"items": [{"index", ...}]}.
+    """
+    numbered = "\n".join(
+        json.dumps({"index": i, "text": t}, ensure_ascii=False) for i, t in enumerate(texts)
+    )
+    return template.generate_fields(target_level=target_level, texts=numbered)
+
+
+def parse_batch_response(raw: str, size: int, fmt: BatchFormat = TEXT_BATCH) -> Dict[int, Any]:
+    """
+    Extrait les résultats indexés d'une réponse groupée.
+    Les éléments mal formés, vides ou hors bornes sont ignorés :
+    l'appelant les traitera individuellement. Une réponse tronquée est
+    réparée, ce qui conserve les éléments complets déjà générés.
+    """
+    items = parse_tolerant(raw).get("items")
+    if not isinstance(items, list):
+        return {}
+
+    results: Dict[int, Any] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        if not isinstance(index, int) or not 0 <= index < size:
+            continue
+        value = fmt.read_item(item)
+        if value is not None:
+            results.setdefault(index, value)
+    return results
+
+
+def generate_batch(
+    texts: List[str],
+    target_level: str,
+    model: str,
+    fmt: BatchFormat = TEXT_BATCH,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Dict[int, Any]:
+    """
+    Une seule génération pour tous les textes. Renvoie les éléments
+    exploitables par index ; {} si l'appel échoue (délai ou annulation
+    compris) ou s'il n'y a qu'un texte.
+    """
+    if len(texts) <= 1:
+        return {}
+    try:
+        data = ollama_post(
+            "/api/generate",
+            {
+                "model": model,
+                **build_batch_prompt(texts, target_level, fmt.template),
+                "stream": False,
+                "format": fmt.schema,
+            },
+            deadline=deadline,
+            cancel=cancel,
+            target_level=target_level,
+            prompt_template=fmt.template.id,
+        )
+        return parse_batch_response(data.get("response", ""), len(texts), fmt)
+    except Exception as e:
+        print(f"[LLM BATCH ERROR] {e}")
+        return {}
+
+
+def simplify_many(
+    texts: List[str],
+    target_level: str,
+    model: str,
+    fallback: Callable[[str, str, str], str],
+) -> List[str]:
+    """
+    Simplifie plusieurs textes en une seule génération (réponse indexée).
+    Chaque élément manquant ou mal formé passe par `fallback`, et un texte
+    seul est envoyé directement à `fallback`. Les exceptions de `fallback`
+    remontent à l'appelant.
+    """
+    results = generate_batch(texts, target_level, model)
+    return [results.get(i) or fallback(text, target_level, model) for i, text in enumerate(texts)]
+
+
+# -------------------------------------------------
+# 3. MICRO-BATCHER
+# -------------------------------------------------
+
+class _Pending:
+    def __init__(self, text: str, deadline: Optional[float]):
+        self.text = text
+        self.deadline = deadline
+        # lu dans le thread de la requête : le minuteur n'en hérite pas
+        self.request_id = request_id_var.get()
+        self.result: Any = None
+        self.done = threading.Event()
+        self.abandoned = False
+
+
+class _Group:
+    def __init__(self):
+        self.items: List[_Pending] = []
+        self.timer: Optional[threading.Timer] = None
+        # vrai une fois le lot parti : plus aucun texte ne s'y ajoute
+        self.closed = False
+        # levé quand tous les appelants ont abandonné : la génération s'arrête
+        self.cancel = threading.Event()
+
+    def deadline(self) -> Optional[float]:
+        # le lot vit aussi longtemps que son appelant le plus patient
+        deadlines = [p.deadline for p in self.items]
+        if any(d is None for d in deadlines):
+            return None
+        return max(deadlines)
+
+
+class MicroBatcher:
+    """
+    Regroupe les textes courts qui partagent le même niveau cible et le même
+    modèle, puis les envoie en une seule génération Ollama.
+
+    `fallback(text, target_level, model, deadline=..., cancel=...)` est
+    appelé pour les textes longs et pour chaque élément manquant ou mal
+    formé de la réponse groupée, dans le thread de l'appelant : les reprises
+    d'un même lot s'exécutent en parallèle, et leurs exceptions remontent
+    à chaque appelant.
+
+    `admit(deadline, cancel)`, s'il est fourni, renvoie un gestionnaire de
+    contexte qui réserve un créneau de génération (ex: thread_slot du
+    contrôle d'admission) : un pour le lot, un pour chaque reprise.
+    Un texte resté seul dans son lot passe directement par `fallback`.
+    """
+
+    def __init__(
+        self,
+        fallback: Callable[[str, str, str], Any],
+        fmt: BatchFormat = TEXT_BATCH,
+        window: float = BATCH_WINDOW,
+        max_size: int = BATCH_MAX_SIZE,
+        max_words: int = BATCH_MAX_WORDS,
+        admit: Optional[Callable[[Optional[float], Optional[threading.Event]], ContextManager]] = None,
+    ):
+        self.fallback = fallback
+        self.admit = admit
+        self.fmt = fmt
+        self.window = window
+        self.max_size = max_size
+        self.max_words = max_words
+        self._lock = threading.Lock()
+        self._groups: Dict[Tuple[str, str], _Group] = {}
+
+    def accepts(self, text: str) -> bool:
+        """Vrai si le texte est assez court pour être regroupé."""
+        return len(text.split()) <= self.max_words
+
+    def submit(
+        self,
+        text: str,
+        target_level: str,
+        model: str,
+        deadline: Optional[float] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Any:
+        """
+        Simplifie `text` ; bloque jusqu'à ce que le lot correspondant soit traité.
+        Lève DeadlineExceeded après `deadline` (horloge time.monotonic) et
+        RequestCancelled si `cancel` est levé, sans attendre la fin du lot.
+        """
+        if not self.accepts(text):
+            return self._fallback(text, target_level, model, deadline, cancel)
+
+        key = (target_level, model)
+        pending = _Pending(text, deadline)
+        batch = None
+
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                group = self._groups[key] = _Group()
+                group.timer = threading.Timer(self.window, self._flush, args=(key, group))
+                group.timer.daemon = True
+                group.timer.start()
+            group.items.append(pending)
+            if len(group.items) >= self.max_size:
+                # lot complet : le minuteur ne doit pas vider le lot suivant
+                del self._groups[key]
+                group.closed = True
+                group.timer.cancel()
+                batch = group
+
+        if batch is not None:
+            self._run(batch, target_level, model)
+
+        self._wait(group, pending, cancel)
+        if pending.result is None:
+            return self._fallback(text, target_level, model, deadline, cancel)
+        return pending.result
+
+    def _admitted(self, deadline: Optional[float], cancel: Optional[threading.Event]) -> ContextManager:
+        return self.admit(deadline, cancel) if self.admit is not None else nullcontext()
+
+    def _fallback(
+        self,
+        text: str,
+        target_level: str,
+        model: str,
+        deadline: Optional[float],
+        cancel: Optional[threading.Event],
+    ) -> Any:
+        with self._admitted(deadline, cancel):
+            return self.fallback(text, target_level, model, deadline=deadline, cancel=cancel)
+
+    def _wait(self, group: _Group, pending: _Pending, cancel: Optional[threading.Event]) -> None:
+        while True:
+            timeout = BATCH_WAIT_POLL
+            if pending.deadline is not None:
+                timeout = min(timeout, max(pending.deadline - time.monotonic(), 0))
+            if pending.done.wait(timeout):
+                return
+            if cancel is not None and cancel.is_set():
+                self._abandon(group, pending)
+                raise RequestCancelled("Generation cancelled by the caller.")
+            if pending.deadline is not None and time.monotonic() >= pending.deadline:
+                self._abandon(group, pending)
+                raise DeadlineExceeded("Request deadline exceeded while waiting for a batch.")
+
+    def _abandon(self, group: _Group, pending: _Pending) -> None:
+        with self._lock:
+            pending.abandoned = True
+            # un lot encore ouvert peut recevoir d'autres textes : il partira
+            if group.closed and all(p.abandoned for p in group.items):
+                group.cancel.set()
+
+    def _flush(self, key: Tuple[str, str], group: _Group) -> None:
+        with self._lock:
+            if self._groups.get(key) is not group:
+                return  # déjà parti (lot complet)
+            del self._groups[key]
+            group.closed = True
+            if all(p.abandoned for p in group.items):
+                group.cancel.set()
+        self._run(group, key[0], key[1])
+
+    def _run(self, group: _Group, target_level: str, model: str) -> None:
+        batch = group.items
+        results: Dict[int, Any] = {}
+        # le log de la génération groupée liste les requêtes du lot
+        token = batch_request_ids_var.set([p.request_id for p in batch if p.request_id])
+        try:
+            if len(batch) > 1 and not group.cancel.is_set():
+                with self._admitted(group.deadline(), group.cancel):
+                    results = generate_batch(
+                        [p.text for p in batch],
+                        target_level,
+                        model,
+                        self.fmt,
+                        deadline=group.deadline(),
+                        cancel=group.cancel,
+                    )
+        except Exception as e:
+            # pas de créneau (file pleine, délai) : chaque appelant reprend seul
+            print(f"[LLM BATCH ERROR] {e}")
+        finally:
+            batch_request_ids_var.reset(token)
+            for i, pending in enumerate(batch):
+                # None : l'appelant refait un appel individuel
+                pending.result = results.get(i)
+                pending.done.set()
@@ -0,0 +1,136 @@
+import threading
+from typing import Callable, Optional
+
+from .batching import BATCHING_ENABLED, MicroBatcher, simplify_many
+from .lite import split_sentences
+from .llm import ollama_post
+from .memory import memory
+from .prompts import SIMPLIFY_TEXT, count_tokens, input_budget, split_to_budget
+from .routing import choose_model
+
+# Simplification d'un texte par le LLM (Ollama), sans dépendance à spaCy :
+# utilisable par le moteur lite, les travaux (jobs.py) et simplify.py.
+
+
+# -------------------------------------------------
+# 1. APPEL INDIVIDUEL
+# -------------------------------------------------
+
+def generate_simplification(
+    text: str,
+    target_level: str,
+    model: str,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """
+    Appel Ollama individuel (un texte = une génération). Les consignes
+    fixes passent en message système, le niveau et le texte en dernier.
+    Lève une exception si aucun backend ne répond ou si la sortie est vide.
+    """
+    data = ollama_post(
+        "/api/chat",
+        {
+            "model": model,
+            "messages": SIMPLIFY_TEXT.chat_messages(target_level=target_level, text=text),
+            "stream": False,
+        },
+        deadline=deadline,
+        cancel=cancel,
+        target_level=target_level,
+        prompt_template=SIMPLIFY_TEXT.id,
+    )
+    # Format de réponse standard de /api/chat d'Ollama
+    simplified = data.get("message", {}).get("content", "").strip()
+    if not simplified:
+        raise ValueError("Empty LLM output.")
+    return simplified
+
+
+def _simplify_with_llm_single(
+    text: str,
+    target_level: str,
+    model: str,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+) -> str:
+    """
+    Comme generate_simplification, mais renvoie le texte d'origine en cas
+    d'échec.
+    """
+    try:
+        return generate_simplification(text, target_level, model, deadline, cancel)
+    except Exception as e:
+        # En cas de problème (Ollama éteint, etc.), on retourne le texte original
+        # pour ne pas casser l'API.
+        print(f"[LLM ERROR] {e}")
+        return text.strip()
+
+
+# Regroupement optionnel des textes courts (EDUSIMPLIFY_LLM_BATCHING=1)
+_batcher = MicroBatcher(_simplify_with_llm_single) if BATCHING_ENABLED else None
+
+
+# -------------------------------------------------
+# 2. TEXTE COMPLET
+# -------------------------------------------------
+
+def simplify_with_llm(
+    text: str,
+    target_level: str = "B1",
+    model: Optional[str] = None,
+    raise_errors: bool = False,
+) -> str:
+    """
+    Utilise un modèle Ollama local pour simplifier un texte en fonction d'un niveau CECRL.
+    On suppose qu'Ollama tourne sur localhost:11434 (ou sur les serveurs de
+    OLLAMA_URLS) et qu'un modèle (ex: 'llama3') est déjà installé : `ollama pull llama3`.
+    Sans `model`, le modèle est choisi par le routeur (petit ou grand modèle
+    selon la difficulté du texte, cf. routing.py).
+    Si le micro-batching est activé, les textes courts sont regroupés avec
+    ceux d'autres requêtes du même niveau dans une seule génération.
+    Un texte qui dépasse le budget d'entrée du niveau (prompts.py) est
+    simplifié par groupes de phrases.
+    Par défaut, un échec du LLM renvoie le texte d'origine ; avec
+    `raise_errors`, l'exception remonte (travaux, qui réessaient).
+    """
+    if count_tokens(text) > input_budget(target_level):
+        parts = split_to_budget(split_sentences(text), target_level)
+        if len(parts) > 1:
+            return " ".join(
+                simplify_with_llm(part, target_level, model, raise_errors) for part in parts
+            )
+    if model is None:
+        model, _ = choose_model(text, target_level)
+    single = generate_simplification if raise_errors else _simplify_with_llm_single
+    if memory is not None:
+        return _simplify_with_memory(text, target_level, model, single)
+    if _batcher is not None and not raise_errors:
+        return _batcher.submit(text, target_level, model)
+    return single(text, target_level, model)
+
+
+def _simplify_with_memory(
+    text: str,
+    target_level: str,
+    model: str,
+    single: Callable[[str, str, str], str] = _simplify_with_llm_single,
+) -> str:
+    """
+    Variante phrase par phrase (EDUSIMPLIFY_TM=1) : les phrases déjà vues,
+    ou presque, sont reprises de la mémoire ; les autres partent ensemble
+    au LLM dans une seule génération indexée, puis sont mémorisées.
+    """
+    sentences = split_sentences(text)
+    outputs = [memory.lookup(s, target_level) for s in sentences]
+    missing = [i for i, out in enumerate(outputs) if out is None]
+
+    if missing:
+        fresh = simplify_many([sentences[i] for i in missing], target_level, model, single)
+        for i, out in zip(missing, fresh):
+            outputs[i] = out
+            # une sortie identique à l'entrée signale souvent un échec du LLM
+            if out.strip() and out.strip() != sentences[i]:
+                memory.add(sentences[i], out, target_level)
+
+    return " ".join(outputs)
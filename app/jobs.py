@@ -0,0 +1,358 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .lite import split_sentences
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Fichier SQLite de la file de travaux (persistant entre deux redémarrages)
+JOBS_DB_PATH = os.environ.get("EDUSIMPLIFY_JOBS_DB", "jobs.db")
+
+# Nombre de threads qui traitent les travaux
+JOB_WORKERS = int(os.environ.get("EDUSIMPLIFY_JOB_WORKERS", "2"))
+
+# Taille visée (en mots) d'un morceau envoyé au LLM
+JOB_CHUNK_WORDS = int(os.environ.get("EDUSIMPLIFY_JOB_CHUNK_WORDS", "200"))
+
+# Attente (secondes) d'un worker quand la file est vide
+JOB_POLL_INTERVAL = 0.5
+
+# Tentatives par morceau avant de passer le travail à l'état `failed`
+JOB_CHUNK_ATTEMPTS = int(os.environ.get("EDUSIMPLIFY_JOB_CHUNK_ATTEMPTS", "3"))
+
+# Attente (secondes) avant la deuxième tentative, doublée ensuite
+JOB_RETRY_DELAY = 5.0
+
+# Un travail `running` sans signe de vie depuis ce délai (secondes) est
+# considéré comme abandonné (processus arrêté) et remis en file
+JOB_LEASE_SECONDS = float(os.environ.get("EDUSIMPLIFY_JOB_LEASE", "30"))
+
+
+# -------------------------------------------------
+# 1. DÉCOUPAGE DES TEXTES LONGS
+# -------------------------------------------------
+
+def _paragraph_parts(paragraph: str, max_words: int) -> List[str]:
+    """
+    Coupe un paragraphe de plus de `max_words` mots aux retours à la ligne
+    et aux fins de phrase. Une phrase n'est jamais coupée.
+    """
+    if len(paragraph.split()) <= max_words:
+        return [paragraph]
+    parts: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    for line in paragraph.splitlines():
+        for sentence in split_sentences(line):
+            n = len(sentence.split())
+            if current and current_len + n > max_words:
+                parts.append(" ".join(current))
+                current, current_len = [], 0
+            current.append(sentence)
+            current_len += n
+
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def split_into_chunks(text: str, max_words: int = JOB_CHUNK_WORDS) -> List[str]:
+    """
+    Regroupe les paragraphes (séparés par une ligne vide) en morceaux
+    d'environ `max_words` mots. Un paragraphe plus long est coupé aux fins
+    de phrase (voir _paragraph_parts).
+    """
+    paragraphs = [
+        part
+        for p in text.split("\n\n")
+        if p.strip()
+        for part in _paragraph_parts(p.strip(), max_words)
+    ]
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+
+    for p in paragraphs:
+        n = len(p.split())
+        if current and current_len + n > max_words:
+            chunks.append("\n\n".join(current))
+            current, current_len = [], 0
+        current.append(p)
+        current_len += n
+
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+# -------------------------------------------------
+# 2. STOCKAGE SQLITE
+# -------------------------------------------------
+
+class JobStore:
+    """
+    File de travaux persistante. Chaque morceau simplifié est enregistré
+    dès qu'il est prêt : un travail interrompu reprend là où il s'était arrêté.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    target_level TEXT,
+                    chunks TEXT NOT NULL,
+                    done_chunks TEXT NOT NULL DEFAULT '[]',
+                    provisional TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def create(self, text: str, target_level: Optional[str], provisional: Optional[Dict[str, Any]] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT INTO jobs (id, status, text, target_level, chunks, provisional, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    text,
+                    target_level,
+                    json.dumps(split_into_chunks(text), ensure_ascii=False),
+                    json.dumps(provisional, ensure_ascii=False) if provisional else None,
+                    now,
+                    now,
+                ),
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[sqlite3.Row]:
+        """
+        Passe le plus ancien travail en attente à l'état `running`.
+        La transaction IMMEDIATE rend la réservation atomique, y compris
+        entre plusieurs processus qui partagent le même fichier.
+        """
+        with self._lock, self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                    (time.time(), row["id"]),
+                )
+            db.execute("COMMIT")
+            return row
+
+    def save_chunk(self, job_id: str, done_chunks: List[str]) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET done_chunks = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(done_chunks, ensure_ascii=False), time.time(), job_id),
+            )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+                (error, time.time(), job_id),
+            )
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        """Prolonge le bail des travaux en cours de traitement."""
+        if not job_ids:
+            return
+        with self._lock, self._connect() as db:
+            db.execute(
+                f"UPDATE jobs SET updated_at = ? WHERE status = 'running'"
+                f" AND id IN ({', '.join('?' * len(job_ids))})",
+                (time.time(), *job_ids),
+            )
+
+    def requeue_stale(self, lease: float = JOB_LEASE_SECONDS) -> int:
+        """
+        Remet en file les travaux `running` dont le bail a expiré : leur
+        processus s'est arrêté sans les terminer. Les morceaux déjà faits
+        sont conservés. Les travaux encore suivis par un worker (heartbeat)
+        ne sont pas touchés, même s'ils appartiennent à un autre processus.
+        """
+        now = time.time()
+        with self._lock, self._connect() as db:
+            cur = db.execute(
+                "UPDATE jobs SET status = 'queued', updated_at = ?"
+                " WHERE status = 'running' AND updated_at < ?",
+                (now, now - lease),
+            )
+            return cur.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Vue publique d'un travail :
+        {job_id, status, progress, provisional, result, error}
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        total = len(json.loads(row["chunks"]))
+        done = len(json.loads(row["done_chunks"]))
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "target_level": row["target_level"],
+            "progress": 1.0 if row["status"] == "done" else (done / total if total else 0.0),
+            "chunks_total": total,
+            "chunks_done": done,
+            "provisional": json.loads(row["provisional"]) if row["provisional"] else None,
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+
+# -------------------------------------------------
+# 3. WORKERS
+# -------------------------------------------------
+
+class JobWorkers:
+    """
+    Pool de threads qui consomment la file. `simplify_chunk(text, target)`
+    simplifie un morceau et doit lever une exception en cas d'échec ;
+    `resolve_target(text, target)` fixe le niveau cible final (utile en
+    mode automatique, quand target est None).
+    Un morceau en échec est réessayé ; après `attempts` échecs, le travail
+    passe à `failed` en gardant ses morceaux faits et sa réponse provisoire.
+
+    Un thread superviseur prolonge le bail des travaux en cours et remet en
+    file ceux dont le bail a expiré (processus arrêté pendant le traitement).
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        simplify_chunk: Callable[[str, str], str],
+        resolve_target: Callable[[str, Optional[str]], str],
+        workers: int = JOB_WORKERS,
+        attempts: int = JOB_CHUNK_ATTEMPTS,
+        retry_delay: float = JOB_RETRY_DELAY,
+        lease: float = JOB_LEASE_SECONDS,
+    ):
+        self.store = store
+        self.simplify_chunk = simplify_chunk
+        self.resolve_target = resolve_target
+        self.workers = workers
+        self.attempts = max(1, attempts)
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self._threads: List[threading.Thread] = []
+        self._running: Set[str] = set()
+        self._running_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        supervisor = threading.Thread(target=self._supervise, name="edusimplify-job-lease", daemon=True)
+        supervisor.start()
+        self._threads.append(supervisor)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"edusimplify-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _supervise(self) -> None:
+        # trois signes de vie par bail : un retard ponctuel ne le fait pas expirer
+        while True:
+            try:
+                with self._running_lock:
+                    running = list(self._running)
+                self.store.heartbeat(running)
+                resumed = self.store.requeue_stale(self.lease)
+                if resumed:
+                    print(f"[JOBS] {resumed} interrupted job(s) requeued.")
+            except Exception as e:
+                print(f"[JOBS ERROR] lease: {e}")
+            time.sleep(self.lease / 3)
+
+    def _loop(self) -> None:
+        while True:
+            row = self.store.claim_next()
+            if row is None:
+                time.sleep(JOB_POLL_INTERVAL)
+                continue
+            with self._running_lock:
+                self._running.add(row["id"])
+            try:
+                self._process(row)
+            except Exception as e:
+                print(f"[JOBS ERROR] {row['id']}: {e}")
+                self.store.fail(row["id"], str(e))
+            finally:
+                with self._running_lock:
+                    self._running.discard(row["id"])
+
+    def _process(self, row: sqlite3.Row) -> None:
+        chunks = json.loads(row["chunks"])
+        done = json.loads(row["done_chunks"])
+        target = self.resolve_target(row["text"], row["target_level"])
+
+        # reprise : on saute les morceaux déjà simplifiés
+        for chunk in chunks[len(done):]:
+            done.append(self._simplify_with_retries(row["id"], chunk, target))
+            self.store.save_chunk(row["id"], done)
+
+        self.store.finish(
+            row["id"],
+            {
+                "simplified": "\n\n".join(done),
+                "target_level": target,
+                "engine": "llm",
+                "chunks": len(chunks),
+            },
+        )
+
+    def _simplify_with_retries(self, job_id: str, chunk: str, target: str) -> str:
+        for attempt in range(self.attempts):
+            try:
+                return self.simplify_chunk(chunk, target)
+            except Exception as e:
+                if attempt + 1 == self.attempts:
+                    raise
+                print(f"[JOBS ERROR] {job_id}: chunk failed (attempt {attempt + 1}): {e}")
+                time.sleep(self.retry_delay * 2 ** attempt)
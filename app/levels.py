@@ -0,0 +1,158 @@
+from collections import Counter
+from typing import Any, Dict, List
+
+from wordfreq import zipf_frequency
+
+# Heuristiques CECRL indépendantes de spaCy : classement des mots par
+# fréquence (wordfreq) et estimation du niveau à partir de comptes déjà
+# faits. Utilisées par cefr.py (spaCy) et par le moteur lite (lite.py).
+
+# -------------------------------------------------
+# 1. DIFFICULTÉ LEXICALE
+# -------------------------------------------------
+
+def zipf_difficulty(z: float) -> str:
+    """
+    Classement simple :
+      >= 4.0  → easy (fréquent)
+      3.0–4.0 → medium
+      < 3.0   → hard (rare)
+    """
+    if z >= 4.0:
+        return "easy"
+    if z >= 3.0:
+        return "medium"
+    return "hard"
+
+
+def word_difficulty(forms: List[str], lemmas: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    `forms` : mots alphabétiques du texte, dans l'ordre ; `lemmas` : premier
+    lemme connu pour chaque forme (à défaut, la forme en minuscules).
+    Retourne une liste de dicts {form, lemma, count, zipf, difficulty},
+    hard d'abord puis par fréquence décroissante.
+    """
+    results = []
+    for form, count in Counter(forms).items():
+        z = zipf_frequency(form, "fr")  # 0–7
+        results.append(
+            {
+                "form": form,
+                "lemma": lemmas.get(form, form.lower()),
+                "count": count,
+                "zipf": float(z),
+                "difficulty": zipf_difficulty(z),
+            }
+        )
+
+    def sort_key(w):
+        order = {"hard": 0, "medium": 1, "easy": 2}
+        return (order.get(w["difficulty"], 1), -w["count"])
+
+    return sorted(results, key=sort_key)
+
+
+# -------------------------------------------------
+# 2. ESTIMATION DU NIVEAU
+# -------------------------------------------------
+
+def estimate_level(sentences: int, tokens: int, avg_len: float, hard_ratio: float) -> Dict[str, Any]:
+    """
+    Heuristique CECRL simple basée sur :
+    - longueur moyenne de phrase
+    - proportion de mots rares ("hard")
+    Retourne :
+    {
+      "estimated_level": "B1",
+      "level_band": ["A2","B1"],
+      "level_band_explanation": "...",
+      "explanation": "..."
+    }
+    """
+    if tokens == 0:
+        return {
+            "estimated_level": "A1",
+            "level_band": ["A1", "A2"],
+            "level_band_explanation": "Texte trop court pour une analyse fiable. On suppose un niveau débutant.",
+            "explanation": "Texte vide ou presque vide.",
+        }
+
+    # Règles heuristiques (tu pourras affiner plus tard)
+    # Combinaison de complexité et de vocabulaire
+    if tokens <= 5:
+        level = "A1"
+        band = ["A1", "A2"]
+        band_expl = "Texte très court avec phrases très simples et vocabulaire de base."
+    else:
+        if hard_ratio > 0.18 or avg_len > 24:
+            level = "C1"
+            band = ["B2", "C1"]
+            band_expl = "Beaucoup de mots rares ou de phrases longues : texte très exigeant."
+        elif hard_ratio > 0.12 or avg_len > 20:
+            level = "B2"
+            band = ["B1", "B2"]
+            band_expl = "Vocabulaire relativement riche et phrases assez longues."
+        elif hard_ratio > 0.07 or avg_len > 16:
+            level = "B1"
+            band = ["A2", "B1"]
+            band_expl = "Complexité moyenne avec quelques mots moins fréquents."
+        elif hard_ratio > 0.03 or avg_len > 12:
+            level = "A2"
+            band = ["A1", "A2"]
+            band_expl = "Phrases courtes, peu de mots rares, mais un peu au-dessus du niveau débutant."
+        else:
+            level = "A1"
+            band = ["A1", "A2"]
+            band_expl = "Phrases courtes, vocabulaire très fréquent : niveau débutant."
+
+    explanation = (
+        f"Niveau estimé {level} basé sur une longueur moyenne de {avg_len:.1f} mots "
+        f"et une proportion de mots rares d’environ {hard_ratio*100:.1f} %."
+    )
+
+    return {
+        "estimated_level": level,
+        "level_band": band,
+        "level_band_explanation": band_expl,
+        "explanation": explanation,
+    }
+
+
+EMPTY_ANALYSIS: Dict[str, Any] = {
+    "estimated_level": "A1",
+    "sentences": 0,
+    "tokens": 0,
+    "avg_sentence_length": 0.0,
+    "word_difficulty": [],
+    "level_band": ["A1", "A2"],
+    "level_band_explanation": "Texte vide. On considère un niveau débutant par défaut.",
+    "explanation": "Aucune phrase à analyser.",
+}
+
+
+def build_analysis(sentences: int, tokens: int, word_difficulty: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Assemble le résultat d'analyse_text à partir des comptes de phrases et
+    de tokens et de la difficulté lexicale.
+    """
+    if sentences > 0:
+        avg_len = tokens / sentences
+    else:
+        avg_len = float(tokens)
+
+    hard_tokens_count = sum(w["count"] for w in word_difficulty if w["difficulty"] == "hard")
+    total_alpha_tokens = sum(w["count"] for w in word_difficulty)
+    hard_ratio = hard_tokens_count / total_alpha_tokens if total_alpha_tokens > 0 else 0.0
+
+    level_info = estimate_level(sentences, tokens, avg_len, hard_ratio)
+
+    return {
+        "estimated_level": level_info["estimated_level"],
+        "sentences": sentences,
+        "tokens": tokens,
+        "avg_sentence_length": float(avg_len),
+        "word_difficulty": word_difficulty,
+        "level_band": level_info["level_band"],
+        "level_band_explanation": level_info["level_band_explanation"],
+        "explanation": level_info["explanation"],
+    }
@@ -0,0 +1,284 @@
+import difflib
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from wordfreq import zipf_frequency
+
+from .levels import EMPTY_ANALYSIS, build_analysis, word_difficulty
+from .rules import (
+    LEXICAL_LEVELS,
+    LEXICAL_MAX_ZIPF,
+    RuleSet,
+    apply_rules,
+    current_rules,
+    rechunk_sentences,
+    register_engine,
+    resolve_strategy,
+)
+
+# Moteur de règles "lite" : mêmes règles que simplify.py, sans spaCy.
+# Le découpage en phrases et en mots est fait par expressions régulières et
+# la substitution lexicale s'appuie sur la seule fréquence (wordfreq), sans
+# étiquetage morpho-syntaxique ni lemmatisation. Démarre en quelques
+# millisecondes, pour les déploiements où charger fr_core_news_sm est exclu.
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# "lite" : l'API n'utilise jamais spaCy (routage, aperçus des travaux, chauffe)
+ENGINE = os.environ.get("EDUSIMPLIFY_ENGINE", "full").lower()
+LITE_ENGINE = ENGINE == "lite"
+
+# Abréviations suivies d'un point qui ne terminent pas une phrase
+ABBREVIATIONS = {
+    "m", "mm", "mme", "mmes", "mlle", "mlles", "dr", "pr", "me", "mgr",
+    "st", "ste", "cf", "ex", "env", "p", "pp", "vol", "chap", "fig",
+    "art", "al", "av", "apr", "no", "tél", "réf",
+}
+
+
+# -------------------------------------------------
+# 1. DÉCOUPAGE EN PHRASES ET EN MOTS
+# -------------------------------------------------
+
+# Ponctuation forte (+ guillemet/parenthèse fermants, avec l'espace
+# insécable ou non de la typographie française : "Bonjour ! »"), espace,
+# puis un début de phrase plausible : majuscule, chiffre, guillemet ou tiret
+# de dialogue
+_SENT_END_RE = re.compile(r"[.!?…]+(?:\s*[»\")])*(?=\s+[«\"(\-—–A-ZÀ-ÖØ-Þ0-9])")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_WORD_BEFORE_RE = re.compile(r"([\w.\-]+)$")
+
+_TOKEN_RE = re.compile(
+    r"aujourd['’]hui"
+    r"|(?:jusqu|lorsqu|puisqu|quoiqu|qu|[cdjlmnst])['’](?=\w)"  # élisions
+    r"|\d+(?:[.,]\d+)*"
+    r"|\w+(?:-\w+)*"
+    r"|[^\w\s]",
+    re.IGNORECASE,
+)
+
+
+def _is_abbreviation(before: str) -> bool:
+    match = _WORD_BEFORE_RE.search(before)
+    if not match:
+        return False
+    word = match.group(1).rstrip(".")
+    # initiale ("J. Dupont", mais pas "à 10 h. Il") ou abréviation connue
+    # ("M. Martin", "cf. Annexe")
+    return (len(word) == 1 and word.isupper()) or word.lower() in ABBREVIATIONS
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Découpe un texte français en phrases : ponctuation forte suivie d'un
+    début de phrase, ou ligne vide. Les abréviations courantes et les
+    initiales ne coupent pas.
+    """
+    sentences: List[str] = []
+    for paragraph in _PARAGRAPH_RE.split(text):
+        start = 0
+        for match in _SENT_END_RE.finditer(paragraph):
+            if match.group(0).startswith(".") and _is_abbreviation(paragraph[start:match.start()]):
+                continue
+            sentence = paragraph[start:match.end()].strip()
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        rest = paragraph[start:].strip()
+        if rest:
+            sentences.append(rest)
+    return sentences
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    """
+    Découpe en mots, élisions (l', qu'...) et ponctuation.
+    Retourne des paires (token, espace qui suit), comme text/whitespace_
+    chez spaCy : "".join(t + ws) redonne le texte.
+    """
+    matches = list(_TOKEN_RE.finditer(text))
+    tokens = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        tokens.append((m.group(0), text[m.end():end]))
+    return tokens
+
+
+# -------------------------------------------------
+# 2. ANALYSE ET RÈGLES DÉPENDANT DU DÉCOUPAGE
+# -------------------------------------------------
+
+def analyze_text_lite(text: str) -> Dict[str, Any]:
+    """
+    Équivalent d'analyze_text sans spaCy. Les lemmes sont les formes en
+    minuscules.
+    """
+    text = (text or "").strip()
+    if not text:
+        return dict(EMPTY_ANALYSIS)
+
+    tokens = tokenize(text)
+    forms = [tok for tok, _ in tokens if tok.isalpha()]
+    return build_analysis(len(split_sentences(text)), len(tokens), word_difficulty(forms, {}))
+
+
+def split_long_sentences_lite(text: str, max_len: int = 22) -> str:
+    """
+    Découpe les phrases longues aux virgules/points-virgules.
+    """
+    return rechunk_sentences(split_sentences(text.replace(";", ",")), max_len)
+
+
+def apply_lexical_rules_lite(text: str, target_level: Optional[str]) -> str:
+    """
+    Substitution lexicale guidée par la fréquence seule : un mot rare est
+    remplacé si sa forme (et non son lemme) figure dans la table.
+    """
+    if target_level is None:
+        return text
+
+    target_level = target_level.upper()
+    if target_level not in LEXICAL_LEVELS:
+        return text
+
+    return _lexical_substitutions_lite(text, current_rules())
+
+
+def _lexical_substitutions_lite(text: str, rules: RuleSet) -> str:
+    out = []
+    for form, ws in tokenize(text):
+        replacement = None
+        if form.isalpha():
+            z = zipf_frequency(form, "fr")
+            if 0 < z <= LEXICAL_MAX_ZIPF:
+                replacement = rules.lexical.get(form.lower())
+        if replacement:
+            if form[0].isupper():
+                replacement = replacement.capitalize()
+            out.append(replacement + ws)
+        else:
+            out.append(form + ws)
+    return "".join(out).strip()
+
+
+register_engine("lite", _lexical_substitutions_lite, split_long_sentences_lite)
+
+
+# -------------------------------------------------
+# 3. PIPELINE LITE
+# -------------------------------------------------
+
+def simplify_text_lite(
+    text: str,
+    mode: str = "standard",
+    strategy: str = "auto",
+    target: Optional[str] = None,
+) -> dict:
+    """
+    Même sortie que simplify_text(engine="rules"), sans spaCy.
+    """
+    original_text = text.strip()
+
+    if not original_text:
+        return {
+            "original": "",
+            "simplified": "",
+            "mode": mode,
+            "strategy": strategy,
+            "target_level": target,
+            "max_len": 0,
+            "strategy_explanation": "Empty text.",
+            "engine": "lite",
+            "analysis_original": None,
+            "analysis_simplified": None,
+        }
+
+    internal_mode, target_level, max_len, strategy_explanation = resolve_strategy(
+        original_text, mode, strategy, target, analyze_text_lite
+    )
+    simplified = apply_rules(
+        original_text,
+        internal_mode,
+        target_level,
+        max_len,
+        engine="lite",
+    )
+
+    return {
+        "original": original_text,
+        "simplified": simplified,
+        "mode": internal_mode,
+        "strategy": strategy,
+        "target_level": target_level,
+        "max_len": max_len,
+        "strategy_explanation": strategy_explanation + " (Rule-based, lite)",
+        "engine": "lite",
+        "analysis_original": analyze_text_lite(original_text),
+        "analysis_simplified": analyze_text_lite(simplified),
+    }
+
+
+# -------------------------------------------------
+# 4. ÉCARTS AVEC LE MOTEUR COMPLET
+# -------------------------------------------------
+
+def compare_with_full(text: str, target: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Passe le texte dans les deux moteurs (charge spaCy) et décrit les écarts :
+    niveau estimé, découpage en phrases de l'original et phrases de sortie
+    qui diffèrent. À utiliser pour valider le moteur lite sur un corpus.
+    """
+    from .cefr import nlp_cefr
+    from .simplify import simplify_text
+    from .vocab import nlp_zone
+
+    strategy = "target" if target else "auto"
+    full = simplify_text(text, strategy=strategy, target=target, engine="rules")
+    lite = simplify_text_lite(text, strategy=strategy, target=target)
+
+    with nlp_zone(nlp_cefr):
+        full_sents = [s.text.strip() for s in nlp_cefr(text.strip()).sents]
+    lite_sents = split_sentences(text.strip())
+
+    def diff(a: List[str], b: List[str]) -> List[Dict[str, List[str]]]:
+        matcher = difflib.SequenceMatcher(a=a, b=b, autojunk=False)
+        return [
+            {"full": a[i1:i2], "lite": b[j1:j2]}
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+            if tag != "equal"
+        ]
+
+    levels = {
+        "full": full["analysis_original"]["estimated_level"],
+        "lite": lite["analysis_original"]["estimated_level"],
+    }
+    output_diff = diff(split_sentences(full["simplified"]), split_sentences(lite["simplified"]))
+    return {
+        "identical": full["simplified"] == lite["simplified"] and levels["full"] == levels["lite"],
+        "target_level": {"full": full["target_level"], "lite": lite["target_level"]},
+        "estimated_level": levels,
+        "sentence_boundaries": diff(full_sents, lite_sents),
+        "output": output_diff,
+        "full": full["simplified"],
+        "lite": lite["simplified"],
+    }
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # python -m app.lite fichier.txt [A1|A2|B1|B2|C1]
+    with open(sys.argv[1], encoding="utf-8") as f:
+        paragraphs = [p for p in f.read().split("\n\n") if p.strip()]
+    level = sys.argv[2] if len(sys.argv) > 2 else None
+    diverging = 0
+    for paragraph in paragraphs:
+        report = compare_with_full(paragraph, level)
+        if not report["identical"]:
+            diverging += 1
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"{diverging}/{len(paragraphs)} paragraph(s) diverge from the full engine.")
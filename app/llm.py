@@ -0,0 +1,73 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .backends import BackendPool
+from .telemetry import record_llm_call
+
+# -------------------------------------------------
+# 0. CONFIGURATION OLLAMA
+# -------------------------------------------------
+
+# Adresse du serveur Ollama (modifiable par variable d'environnement)
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+
+# Plusieurs serveurs possibles, séparés par des virgules :
+# OLLAMA_URLS="http://gpu1:11434,http://gpu2:11434"
+OLLAMA_URLS = [
+    u.strip() for u in os.environ.get("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()
+]
+
+# Durée pendant laquelle Ollama garde le modèle en mémoire après un appel.
+# Par défaut Ollama décharge le modèle après 5 minutes d'inactivité : le
+# premier appel suivant paie alors tout le temps de chargement.
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Timeout (en secondes) des appels de génération
+OLLAMA_TIMEOUT = float(os.environ.get("OLLAMA_TIMEOUT", "60"))
+
+# Générations simultanées maximales par backend, pour ce processus : sous
+# serve.py, chaque worker applique sa propre limite
+OLLAMA_MAX_INFLIGHT = int(os.environ.get("OLLAMA_MAX_INFLIGHT", "4"))
+
+# Pool partagé par toute l'application
+pool = BackendPool(OLLAMA_URLS, max_inflight=OLLAMA_MAX_INFLIGHT)
+
+
+# -------------------------------------------------
+# 1. APPEL HTTP
+# -------------------------------------------------
+
+def ollama_post(
+    path: str,
+    payload: Dict[str, Any],
+    timeout: float = OLLAMA_TIMEOUT,
+    deadline: Optional[float] = None,
+    cancel: Optional[threading.Event] = None,
+    on_chunk: Optional[Callable[[str], bool]] = None,
+    target_level: Optional[str] = None,
+    prompt_template: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Envoie une requête JSON à Ollama (ex: "/api/generate", "/api/chat").
+    Ajoute le `keep_alive` configuré si l'appelant ne l'a pas précisé.
+    La requête part vers le backend le moins chargé du pool, avec bascule
+    sur un autre backend en cas de panne.
+    `deadline` (time.monotonic) borne la durée totale ; `cancel` permet
+    d'interrompre la génération depuis un autre thread ; `on_chunk` reçoit
+    le texte au fil du streaming et peut l'arrêter en renvoyant True.
+    Les statistiques de génération (tokens, durées) sont enregistrées par
+    modèle et niveau cible (`target_level`) ; `prompt_template` (ex:
+    "simplify_text@2") est reporté dans le log pour comparer les versions.
+    Lève une exception si aucun backend n'a pu répondre.
+    """
+    body = dict(payload)
+    body.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+
+    start = time.monotonic()
+    data = pool.post(path, body, timeout=timeout, deadline=deadline, cancel=cancel, on_chunk=on_chunk)
+    record_llm_call(
+        data, body.get("model"), target_level, path, time.monotonic() - start, prompt_template
+    )
+    return data
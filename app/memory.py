@@ -0,0 +1,326 @@
+import atexit
+import difflib
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Active la mémoire de simplification (réutilisation phrase par phrase)
+MEMORY_ENABLED = os.environ.get("EDUSIMPLIFY_TM", "0") == "1"
+
+# Fichier de sauvegarde de la mémoire
+MEMORY_PATH = os.environ.get("EDUSIMPLIFY_TM_PATH", "simplification_memory.json")
+
+# Nombre maximal de paires conservées (les moins récemment utilisées sortent)
+MEMORY_MAX_ENTRIES = int(os.environ.get("EDUSIMPLIFY_TM_MAX_ENTRIES", "20000"))
+
+# Similarité minimale (Jaccard estimée) pour réutiliser une paire
+MEMORY_THRESHOLD = float(os.environ.get("EDUSIMPLIFY_TM_THRESHOLD", "0.8"))
+
+# Sauvegarde sur disque (thread d'arrière-plan) toutes les N nouvelles paires
+MEMORY_SAVE_EVERY = 50
+
+# MinHash : NUM_PERM permutations, découpées en BANDS bandes pour le LSH
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+
+# Nombre maximal de candidats dont on tente l'adaptation
+MAX_ADAPT_ATTEMPTS = 3
+
+_MERSENNE = (1 << 61) - 1
+_PERMS = [
+    (
+        int.from_bytes(hashlib.blake2b(b"a%d" % i, digest_size=8).digest(), "big") % _MERSENNE | 1,
+        int.from_bytes(hashlib.blake2b(b"b%d" % i, digest_size=8).digest(), "big") % _MERSENNE,
+    )
+    for i in range(NUM_PERM)
+]
+
+
+# -------------------------------------------------
+# 1. NORMALISATION, SIGNATURES
+# -------------------------------------------------
+
+def normalize(sentence: str) -> str:
+    s = sentence.lower().replace("’", "'")
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _shingles(norm: str) -> Set[str]:
+    if len(norm) <= SHINGLE_SIZE:
+        return {norm}
+    return {norm[i:i + SHINGLE_SIZE] for i in range(len(norm) - SHINGLE_SIZE + 1)}
+
+
+def minhash(norm: str) -> List[int]:
+    """
+    Signature MinHash stable d'un processus à l'autre (blake2b, pas hash()),
+    pour pouvoir la sauvegarder sur disque.
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for sh in _shingles(norm)
+    ]
+    return [min((a * h + b) % _MERSENNE for h in hashes) for a, b in _PERMS]
+
+
+def _similarity(sig1: List[int], sig2: List[int]) -> float:
+    return sum(1 for x, y in zip(sig1, sig2) if x == y) / NUM_PERM
+
+
+def _band_keys(level: str, sig: List[int]) -> List[Tuple]:
+    return [(level, b, tuple(sig[b * ROWS:(b + 1) * ROWS])) for b in range(BANDS)]
+
+
+# -------------------------------------------------
+# 2. ADAPTATION LÉGÈRE
+# -------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def adapt(source: str, stored_source: str, stored_output: str) -> Optional[str]:
+    """
+    Reporte sur la sortie stockée les remplacements de mots qui distinguent
+    la nouvelle phrase de la phrase stockée (noms propres, nombres, dates...).
+    Renvoie None si une différence ne peut pas être reportée proprement :
+    l'appelant passe alors par le LLM.
+    """
+    new_tokens = _TOKEN_RE.findall(source)
+    old_tokens = _TOKEN_RE.findall(stored_source)
+    out = stored_output
+
+    matcher = difflib.SequenceMatcher(a=old_tokens, b=new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag != "replace":
+            return None  # ajout ou suppression : sens potentiellement changé
+        old = " ".join(old_tokens[i1:i2])
+        new = " ".join(new_tokens[j1:j2])
+        if len(old) < 3 and not old.isdigit():
+            return None  # mots grammaticaux (le/la, de/du...) : accord à refaire
+        pattern = r"(?<!\w)" + re.escape(old) + r"(?!\w)"
+        if len(re.findall(pattern, out)) != 1:
+            return None  # absent (reformulé) ou ambigu dans la sortie
+        out = re.sub(pattern, lambda m: new, out)
+    return out
+
+
+# -------------------------------------------------
+# 3. MÉMOIRE
+# -------------------------------------------------
+
+class SimplificationMemory:
+    """
+    Mémoire de traduction phrase source -> phrase simplifiée, par niveau cible.
+    Les quasi-doublons sont retrouvés par MinHash + LSH (bandes), la taille
+    est bornée (LRU) et le contenu est sauvegardé dans un fichier JSON.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = MEMORY_PATH,
+        max_entries: int = MEMORY_MAX_ENTRIES,
+        threshold: float = MEMORY_THRESHOLD,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._buckets: Dict[Tuple, Set[int]] = {}
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._next_id = 0
+        self._unsaved = 0
+        self._saving = False
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    # --- Index ---
+
+    def _insert(self, level: str, source: str, output: str, sig: List[int]) -> None:
+        key = (level, normalize(source))
+        old_id = self._exact.pop(key, None)
+        if old_id is not None:
+            self._remove(old_id)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {"level": level, "source": source, "output": output, "sig": sig}
+        self._exact[key] = entry_id
+        for band in _band_keys(level, sig):
+            self._buckets.setdefault(band, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            entry = self._entries[oldest]
+            self._exact.pop((entry["level"], normalize(entry["source"])), None)
+            self._remove(oldest)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for band in _band_keys(entry["level"], entry["sig"]):
+            ids = self._buckets.get(band)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._buckets[band]
+
+    # --- API ---
+
+    def lookup(self, sentence: str, level: str) -> Optional[str]:
+        """
+        Renvoie la simplification d'une phrase identique ou quasi identique
+        déjà traitée pour ce niveau (adaptée si besoin), sinon None.
+        """
+        norm = normalize(sentence)
+        with self._lock:
+            exact_id = self._exact.get((level, norm))
+            if exact_id is not None:
+                self._entries.move_to_end(exact_id)
+                self.hits += 1
+                return self._entries[exact_id]["output"]
+
+            sig = minhash(norm)
+            candidates: Set[int] = set()
+            for band in _band_keys(level, sig):
+                candidates |= self._buckets.get(band, set())
+
+            scored = sorted(
+                ((_similarity(sig, self._entries[c]["sig"]), c) for c in candidates),
+                reverse=True,
+            )
+            for score, entry_id in scored[:MAX_ADAPT_ATTEMPTS]:
+                if score < self.threshold:
+                    break
+                entry = self._entries[entry_id]
+                adapted = adapt(sentence, entry["source"], entry["output"])
+                if adapted is not None:
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return adapted
+
+            self.misses += 1
+            return None
+
+    def add(self, sentence: str, output: str, level: str) -> None:
+        with self._lock:
+            self._insert(level, sentence, output, minhash(normalize(sentence)))
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= MEMORY_SAVE_EVERY and not self._saving
+            if should_save:
+                self._saving = True
+        if should_save:
+            # l'écriture (tout le fichier) ne retarde pas la requête en cours
+            threading.Thread(target=self._save_in_background, name="edusimplify-memory-save", daemon=True).start()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reuse_rate": self.hits / total if total else 0.0,
+            }
+
+    # --- Persistance ---
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            entries = [
+                {"level": e["level"], "source": e["source"], "output": e["output"]}
+                for e in self._entries.values()
+            ]
+            known = set(self._exact)
+            self._unsaved = 0
+        # les autres workers (serve.py) écrivent dans le même fichier : la
+        # lecture, la fusion et le remplacement se font sous un verrou commun
+        with self._file_lock():
+            # on conserve, comme plus anciennes, les paires qu'ils ont ajoutées
+            others = [
+                e for e in self._read_saved()
+                if (e["level"], normalize(e["source"])) not in known
+            ]
+            entries = (others + entries)[-self.max_entries:]
+            fd, tmp = tempfile.mkstemp(
+                prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                dir=os.path.dirname(self.path) or ".",
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def _save_in_background(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            print(f"[MEMORY ERROR] save failed: {e}")
+        finally:
+            with self._lock:
+                self._saving = False
+
+    @contextmanager
+    def _file_lock(self):
+        # fichier voisin : le fichier de la mémoire est remplacé à chaque sauvegarde
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_saved(self) -> List[dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+            if not isinstance(entries, list):
+                raise ValueError("not a list of pairs")
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            print(f"[MEMORY ERROR] {self.path} unreadable, overwritten: {e}")
+            return []
+        return [
+            e for e in entries
+            if isinstance(e, dict) and all(isinstance(e.get(k), str) for k in ("level", "source", "output"))
+        ]
+
+    def load(self) -> None:
+        entries = self._read_saved()
+        with self._lock:
+            for e in entries[-self.max_entries:]:
+                self._insert(e["level"], e["source"], e["output"], minhash(normalize(e["source"])))
+
+
+memory = SimplificationMemory() if MEMORY_ENABLED else None
+if memory is not None:
+    atexit.register(memory.save)
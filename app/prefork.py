@@ -0,0 +1,237 @@
+import atexit
+import gc
+import glob
+import importlib
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict
+
+import uvicorn
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Nombre de processus workers par défaut
+PREFORK_WORKERS = int(os.environ.get("EDUSIMPLIFY_WORKERS", str(os.cpu_count() or 2)))
+
+# Délai minimal (secondes) entre deux redémarrages d'un même worker
+RESPAWN_DELAY = 1.0
+
+# Au-delà de cette mémoire résidente (Mo), un worker termine ses requêtes en
+# cours puis s'arrête, et le maître le relance (0 = jamais). C'est ce qui
+# borne la croissance du Vocab spaCy quand les memory zones sont désactivées
+# (réglage par défaut, cf. vocab.py) ; un worker fr_core_news_sm démarre
+# bien en dessous.
+MAX_WORKER_RSS_MB = int(os.environ.get("EDUSIMPLIFY_MAX_RSS_MB", "1024"))
+
+# Intervalle (secondes) entre deux mesures de la mémoire d'un worker
+RSS_CHECK_INTERVAL = 30.0
+
+# Intervalle (secondes) entre deux publications des métriques d'un worker
+# (jauges à jour même sans appel LLM, cf. telemetry.share_metrics)
+METRICS_PUBLISH_INTERVAL = 15.0
+
+
+# -------------------------------------------------
+# 1. PRÉCHARGEMENT (PROCESSUS MAÎTRE)
+# -------------------------------------------------
+
+def preload() -> None:
+    """
+    Charge une fois pour toutes, avant le fork, tout ce qui est en lecture
+    seule : pipeline spaCy (sauf moteur lite), tables de lexique, données
+    wordfreq. Un texte de chauffe force aussi le chargement paresseux des
+    tables de lemmes.
+    """
+    from wordfreq import zipf_frequency
+
+    from .lite import LITE_ENGINE, simplify_text_lite
+    from .warmup import WARMUP_TEXT
+
+    zipf_frequency("école", "fr")  # charge la liste de fréquences française
+    if LITE_ENGINE:
+        simplify_text_lite(WARMUP_TEXT, strategy="target", target="A2")
+        return
+
+    from .simplify import apply_lexical_rules, simplify_text
+
+    simplify_text(WARMUP_TEXT, strategy="target", target="A2", engine="rules")
+    apply_lexical_rules(WARMUP_TEXT, "A1")
+
+
+def freeze_shared_heap() -> None:
+    """
+    Déplace tous les objets existants dans la génération permanente du GC.
+    Le ramasse-miettes ne les parcourt plus, et n'écrit donc plus dans leurs
+    en-têtes : les pages héritées du maître restent partagées (copy-on-write)
+    au lieu d'être dupliquées dans chaque worker.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def _load_app(app_path: str):
+    module_name, _, attr = app_path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr or "app")
+
+
+# -------------------------------------------------
+# 2. WORKERS & SUPERVISION
+# -------------------------------------------------
+
+def _watch_rss(server: uvicorn.Server, limit_bytes: int) -> None:
+    """
+    Filet de sécurité si la mémoire monte malgré tout (fragmentation,
+    caches) : demande un arrêt propre du worker, que le maître relance.
+    """
+    from .telemetry import process_rss_bytes
+
+    while not server.should_exit:
+        time.sleep(RSS_CHECK_INTERVAL)
+        rss = process_rss_bytes()
+        if rss > limit_bytes:
+            print(f"[PREFORK] worker {os.getpid()} RSS {rss // 2**20} MB > {limit_bytes // 2**20} MB, recycling")
+            server.should_exit = True
+            return
+
+
+def _publish_metrics(server: uvicorn.Server) -> None:
+    from .telemetry import publish_metrics
+
+    while not server.should_exit:
+        publish_metrics()
+        time.sleep(METRICS_PUBLISH_INTERVAL)
+
+
+def _run_worker(app, sock: socket.socket, index: int) -> None:
+    # seul le worker 0 traite la file de travaux (voir main.start_job_workers)
+    os.environ["EDUSIMPLIFY_RUN_JOBS"] = "1" if index == 0 else "0"
+    gc.enable()
+    config = uvicorn.Config(app, log_level="info")
+    server = uvicorn.Server(config)
+    if MAX_WORKER_RSS_MB > 0:
+        threading.Thread(
+            target=_watch_rss, args=(server, MAX_WORKER_RSS_MB * 2**20), name="edusimplify-rss", daemon=True
+        ).start()
+    threading.Thread(target=_publish_metrics, args=(server,), name="edusimplify-metrics", daemon=True).start()
+    server.run(sockets=[sock])
+
+
+def _exit_worker(signum, frame) -> None:
+    # uvicorn relance le signal reçu une fois arrêté proprement : on le
+    # convertit en SystemExit pour passer par _save_worker_state
+    raise SystemExit(0)
+
+
+def _save_worker_state() -> None:
+    """
+    Sauvegarde ce que le worker a appris (mémoire de simplification) et ses
+    derniers compteurs avant os._exit, qui n'exécute pas les fonctions atexit.
+    """
+    from .memory import memory
+    from .telemetry import publish_metrics
+
+    publish_metrics()
+
+    if memory is None:
+        return
+    try:
+        memory.save()
+    except Exception as e:
+        print(f"[PREFORK ERROR] worker {os.getpid()}: memory save failed: {e}")
+
+
+def _spawn(app, sock: socket.socket, index: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, _exit_worker)
+        signal.signal(signal.SIGINT, _exit_worker)
+        try:
+            _run_worker(app, sock, index)
+        finally:
+            _save_worker_state()
+            os._exit(0)
+    return pid
+
+
+def serve(app_path: str, host: str = "0.0.0.0", port: int = 8000, workers: int = PREFORK_WORKERS) -> None:
+    """
+    Lance le serveur en mode pre-fork : le maître charge l'application et
+    les modèles, ouvre le socket d'écoute, puis fork `workers` processus
+    uvicorn qui partagent ce socket et la mémoire préchargée.
+    Un worker qui meurt (ou qui dépasse EDUSIMPLIFY_MAX_RSS_MB) est relancé ;
+    SIGTERM/SIGINT arrête tout le groupe.
+    """
+    # pas de collecte pendant le chargement : évite de fragmenter le tas
+    # partagé avant le gel
+    gc.disable()
+    app = _load_app(app_path)
+    preload()
+    freeze_shared_heap()
+    # seuls les workers enrichissent la mémoire de simplification : la copie du
+    # maître, figée au fork, écraserait leurs sauvegardes à l'arrêt
+    from .memory import memory
+
+    if memory is not None:
+        atexit.unregister(memory.save)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    # /metrics additionne les compteurs publiés par chaque worker
+    from . import telemetry
+
+    own_metrics_dir = not telemetry.METRICS_DIR
+    metrics_dir = telemetry.METRICS_DIR or tempfile.mkdtemp(prefix="edusimplify-metrics-")
+    for stale in glob.glob(os.path.join(metrics_dir, "*.json")):
+        os.unlink(stale)  # compteurs d'un lancement précédent
+    telemetry.share_metrics(metrics_dir)
+
+    children: Dict[int, int] = {}  # pid -> index
+    for index in range(workers):
+        children[_spawn(app, sock, index)] = index
+    print(f"[PREFORK] master {os.getpid()} serving on {host}:{port} with {workers} workers")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        index = children.pop(pid, None)
+        if index is None or stopping:
+            continue
+        print(f"[PREFORK] worker {pid} exited ({status}), restarting slot {index}")
+        time.sleep(RESPAWN_DELAY)
+        children[_spawn(app, sock, index)] = index
+
+    sock.close()
+    if own_metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+    sys.exit(0)
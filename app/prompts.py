@@ -0,0 +1,270 @@
+import json
+import math
+import os
+import re
+from typing import Dict, List, Optional
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Budget maximal (tokens estimés) du texte à simplifier, par niveau cible.
+# Les niveaux bas produisent des sorties plus longues que l'entrée : on leur
+# laisse moins de place pour que consignes + texte + réponse tiennent dans
+# le contexte par défaut d'Ollama (2048 tokens).
+# Surchargeable via EDUSIMPLIFY_PROMPT_BUDGETS (JSON partiel).
+DEFAULT_INPUT_BUDGETS: Dict[str, int] = {
+    "A1": 500,
+    "A2": 600,
+    "B1": 700,
+    "B2": 800,
+    "C1": 800,
+    "C2": 800,
+    "default": 700,  # niveau absent ou inconnu
+}
+
+INPUT_BUDGETS: Dict[str, int] = dict(
+    DEFAULT_INPUT_BUDGETS,
+    **json.loads(os.environ.get("EDUSIMPLIFY_PROMPT_BUDGETS", "{}")),
+)
+
+# Nombre moyen de caractères par token (tokenizers BPE Llama, texte français)
+CHARS_PER_TOKEN = 3.5
+
+_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class PromptTooLong(ValueError):
+    """Le texte dépasse le budget d'entrée du niveau cible."""
+
+    def __init__(self, tokens: int, budget: int, level: str):
+        self.tokens = tokens
+        self.budget = budget
+        self.level = level
+        super().__init__(
+            f"Text is too long for level {level}: ~{tokens} tokens, budget {budget}. "
+            "Use the job API (POST /jobs) for long texts."
+        )
+
+
+# -------------------------------------------------
+# 1. COMPTAGE DES TOKENS & BUDGETS
+# -------------------------------------------------
+
+def count_tokens(text: str) -> int:
+    """
+    Estimation du nombre de tokens sans charger le tokenizer du modèle :
+    un signe de ponctuation = un token, un mot = un token par tranche de
+    CHARS_PER_TOKEN caractères. Légèrement pessimiste sur le français.
+    """
+    return sum(max(1, math.ceil(len(piece) / CHARS_PER_TOKEN)) for piece in _PIECE_RE.findall(text))
+
+
+def input_budget(target_level: Optional[str]) -> int:
+    level = (target_level or "").strip().split(" ")[0].upper()
+    return INPUT_BUDGETS.get(level, INPUT_BUDGETS["default"])
+
+
+def check_budget(text: str, target_level: Optional[str]) -> int:
+    """
+    Compte les tokens du texte et lève PromptTooLong s'il dépasse le budget
+    du niveau cible. Renvoie le nombre de tokens estimé.
+    """
+    tokens = count_tokens(text)
+    budget = input_budget(target_level)
+    if tokens > budget:
+        raise PromptTooLong(tokens, budget, (target_level or "default").split(" ")[0])
+    return tokens
+
+
+def split_to_budget(sentences: List[str], target_level: Optional[str]) -> List[str]:
+    """
+    Regroupe des phrases consécutives en morceaux qui tiennent chacun dans
+    le budget du niveau (une phrase trop longue forme un morceau à elle seule).
+    """
+    budget = input_budget(target_level)
+    parts: List[str] = []
+    current: List[str] = []
+    used = 0
+    for sentence in sentences:
+        n = count_tokens(sentence)
+        if current and used + n > budget:
+            parts.append(" ".join(current))
+            current, used = [], 0
+        current.append(sentence)
+        used += n
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+# -------------------------------------------------
+# 2. GABARITS
+# -------------------------------------------------
+
+class PromptTemplate:
+    """
+    Gabarit versionné. `system` est identique d'une requête à l'autre :
+    Ollama réutilise alors le cache KV de ce préfixe et n'évalue que la
+    partie variable (`user`), placée en dernier.
+    """
+
+    def __init__(self, name: str, version: str, system: str, user: str):
+        self.name = name
+        self.version = version
+        self.system = system.strip()
+        self.user = user.strip()
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def user_prompt(self, **fields: str) -> str:
+        return self.user.format(**fields)
+
+    def chat_messages(self, **fields: str) -> List[Dict[str, str]]:
+        """Messages pour /api/chat."""
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.user_prompt(**fields)},
+        ]
+
+    def generate_fields(self, **fields: str) -> Dict[str, str]:
+        """Champs `system` et `prompt` pour /api/generate."""
+        return {"system": self.system, "prompt": self.user_prompt(**fields)}
+
+
+# main.py : analyse + simplification, réponse JSON (schéma SIMPLIFY_SCHEMA)
+SIMPLIFY_JSON = PromptTemplate(
+    "simplify_json",
+    "2",
+    system="""
+You are a strict French language expert. You must Output ONLY valid JSON.
+
+Task:
+1. Analyze the CEFR level of the input text (A1, A2, B1, B2, C1, or C2).
+2. Simplify the text to the target level given with the input.
+
+Response Format (JSON only):
+{
+    "detected_level": "Level detected (e.g. B2)",
+    "target_level": "The target level given with the input",
+    "simplified_text": "The simplified French text...",
+    "cefr_explanation": "Brief reason why the original is this level.",
+    "level_explanation": "French explanation of the original CEFR level.",
+    "simplification_strategy": "French explanation of how the text was simplified."
+}
+""",
+    user="""
+Target level: {target_level}
+
+Input Text:
+{text}
+""",
+)
+
+# api.py : simplification FLE, avec ou sans niveau cible
+SIMPLIFY_FLE = PromptTemplate(
+    "simplify_fle",
+    "2",
+    system="""
+Tu es un expert en FLE. Simplifie le texte fourni pour le niveau du CECR indiqué ; si aucun niveau n'est indiqué, simplifie-le pour un public d'apprenants.
+Règles :
+- Ne change pas le sens.
+- Utilise des phrases simples.
+- Utilise un vocabulaire adapté au niveau cible.
+- Réduis les tournures trop complexes.
+- N’ajoute pas d’informations.
+Donne uniquement la version simplifiée.
+""",
+    user="""
+Niveau cible : {target_level}
+
+Texte : {text}
+""",
+)
+
+# simplify.py : simplification d'un texte (sortie texte brut)
+SIMPLIFY_TEXT = PromptTemplate(
+    "simplify_text",
+    "2",
+    system="""
+Tu es un professeur de FLE et un expert en simplification de texte.
+
+Simplifie le texte fourni pour un apprenant du niveau CECRL indiqué.
+
+RÈGLES :
+- Garde tout le sens important.
+- Utilise un vocabulaire fréquent et transparent.
+- Raccourcis les phrases si nécessaire.
+- Évite le vocabulaire archaïque ou trop littéraire.
+- Ne change pas les noms propres.
+- Réponds UNIQUEMENT avec le texte simplifié, sans commentaire.
+""",
+    user="""
+Niveau cible : {target_level} (CECRL)
+
+Texte à simplifier :
+{text}
+""",
+)
+
+# batching.py : plusieurs textes numérotés, réponse JSON indexée
+SIMPLIFY_BATCH = PromptTemplate(
+    "simplify_batch",
+    "2",
+    system="""
+Tu es un professeur de FLE et un expert en simplification de texte.
+
+Simplifie CHACUN des textes fournis pour un apprenant du niveau CECRL indiqué.
+
+RÈGLES :
+- Garde tout le sens important.
+- Utilise un vocabulaire fréquent et transparent.
+- Raccourcis les phrases si nécessaire.
+- Ne change pas les noms propres.
+- Traite chaque texte séparément, sans mélanger leur contenu.
+
+Réponds UNIQUEMENT en JSON, au format :
+{"items": [{"index": 0, "simplified": "..."}, ...]}
+avec exactement un élément par texte.
+""",
+    user="""
+Niveau cible : {target_level} (CECRL)
+
+Textes à simplifier (un objet JSON par ligne) :
+{texts}
+""",
+)
+
+# main.py (micro-batching) : analyse + simplification de plusieurs textes
+SIMPLIFY_JSON_BATCH = PromptTemplate(
+    "simplify_json_batch",
+    "1",
+    system="""
+You are a strict French language expert. You must Output ONLY valid JSON.
+
+For EACH numbered input text, separately:
+1. Analyze the CEFR level of the text (A1, A2, B1, B2, C1, or C2).
+2. Simplify the text to the target level given with the input.
+
+Response Format (JSON only), exactly one item per input text:
+{"items": [
+    {
+        "index": "Index of the input text",
+        "detected_level": "Level detected (e.g. B2)",
+        "target_level": "The target level given with the input",
+        "simplified_text": "The simplified French text...",
+        "cefr_explanation": "Brief reason why the original is this level.",
+        "level_explanation": "French explanation of the original CEFR level.",
+        "simplification_strategy": "French explanation of how the text was simplified."
+    }
+]}
+""",
+    user="""
+Target level: {target_level}
+
+Input Texts (one JSON object per line):
+{texts}
+""",
+)
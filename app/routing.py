@@ -0,0 +1,111 @@
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# -------------------------------------------------
+# 0. MODÈLES & POLITIQUE DE ROUTAGE
+# -------------------------------------------------
+
+# Petit modèle (rapide, peu coûteux) et grand modèle (meilleure qualité)
+SMALL_MODEL = os.environ.get("EDUSIMPLIFY_SMALL_MODEL", "llama3.2")
+LARGE_MODEL = os.environ.get("EDUSIMPLIFY_LARGE_MODEL", "llama3")
+
+# "auto" (routage), "small" ou "large" (modèle imposé)
+MODEL_ROUTING = os.environ.get("EDUSIMPLIFY_MODEL_ROUTING", "auto").lower()
+
+# Seuils au-delà desquels le texte part vers le grand modèle.
+# Surchargeable via EDUSIMPLIFY_ROUTING_POLICY (JSON partiel).
+DEFAULT_ROUTING_POLICY: Dict[str, Any] = {
+    "max_words_small": 80,        # longueur (tokens spaCy)
+    "max_hard_ratio_small": 0.12,  # proportion de mots rares (Zipf < 3)
+    "max_level_gap_small": 2,      # écart niveau estimé -> niveau cible
+    "large_targets": ["C1"],       # cibles qui demandent une réécriture fine
+}
+
+ROUTING_POLICY: Dict[str, Any] = dict(
+    DEFAULT_ROUTING_POLICY,
+    **json.loads(os.environ.get("EDUSIMPLIFY_ROUTING_POLICY", "{}")),
+)
+
+LEVEL_ORDER = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+
+def routed_models() -> List[str]:
+    """Modèles susceptibles d'être choisis (à garder chauds)."""
+    if MODEL_ROUTING == "small":
+        return [SMALL_MODEL]
+    if MODEL_ROUTING == "large":
+        return [LARGE_MODEL]
+    return list(dict.fromkeys([SMALL_MODEL, LARGE_MODEL]))
+
+
+def _normalize_level(level: Optional[str]) -> Optional[str]:
+    """Ex: "A2 (Elementary)" -> "A2" ; None, vide ou niveau inconnu -> None."""
+    words = (level or "").split()
+    if not words:
+        return None
+    code = words[0].upper()
+    return code if code in LEVEL_ORDER else None
+
+
+def _hard_ratio(analysis: Dict[str, Any]) -> float:
+    words = analysis.get("word_difficulty") or []
+    total = sum(w["count"] for w in words)
+    hard = sum(w["count"] for w in words if w["difficulty"] == "hard")
+    return hard / total if total else 0.0
+
+
+# -------------------------------------------------
+# 1. CHOIX DU MODÈLE
+# -------------------------------------------------
+
+def choose_model(
+    text: str,
+    target_level: Optional[str] = None,
+    analysis: Optional[Dict[str, Any]] = None,
+    policy: Optional[Dict[str, Any]] = None,
+) -> Tuple[str, str]:
+    """
+    Choisit le modèle à partir de signaux peu coûteux issus d'analyze_text
+    (niveau estimé, longueur, proportion de mots rares) et du niveau cible.
+    Les textes courts et faciles vont au petit modèle, les autres au grand.
+    Retourne (modèle, raison).
+    """
+    if MODEL_ROUTING == "small":
+        return SMALL_MODEL, "forced (EDUSIMPLIFY_MODEL_ROUTING=small)"
+    if MODEL_ROUTING == "large":
+        return LARGE_MODEL, "forced (EDUSIMPLIFY_MODEL_ROUTING=large)"
+
+    if analysis is None:
+        # import tardif : charge spaCy seulement au premier routage
+        # (jamais avec le moteur lite)
+        from .lite import LITE_ENGINE, analyze_text_lite
+
+        if LITE_ENGINE:
+            analysis = analyze_text_lite(text)
+        else:
+            from .cefr import analyze_text
+
+            analysis = analyze_text(text)
+
+    policy = policy or ROUTING_POLICY
+    target = _normalize_level(target_level)
+    estimated = _normalize_level(analysis.get("estimated_level")) or "B1"
+
+    if target in policy["large_targets"]:
+        return LARGE_MODEL, f"target {target} requires fine rewriting"
+
+    words = analysis.get("tokens", 0)
+    if words > policy["max_words_small"]:
+        return LARGE_MODEL, f"long text ({words} tokens)"
+
+    hard_ratio = _hard_ratio(analysis)
+    if hard_ratio > policy["max_hard_ratio_small"]:
+        return LARGE_MODEL, f"rare vocabulary ({hard_ratio:.0%} hard words)"
+
+    if target is not None:
+        gap = LEVEL_ORDER.index(estimated) - LEVEL_ORDER.index(target)
+        if gap > policy["max_level_gap_small"]:
+            return LARGE_MODEL, f"large level gap ({estimated} -> {target})"
+
+    return SMALL_MODEL, f"short and easy text ({estimated}, {words} tokens)"
@@ -0,0 +1,631 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Règles de simplification qui ne dépendent pas de spaCy : tables de
+# substitution et réécritures sur chaînes. Partagées par le moteur complet
+# (simplify.py) et le moteur lite (lite.py).
+
+
+# -------------------------------------------------
+# 1. RÉÉCRITURE C1 (style plus soutenu)
+# -------------------------------------------------
+
+C1_REWRITES = [
+    ("Je vais à l'école", "Je me rends à l'école"),
+    ("Je vais à l’ecole", "Je me rends à l’ecole"),
+    ("Je vais à l’école", "Je me rends à l’école"),
+    ("je vais à l'école", "je me rends à l'école"),
+    ("je vais à l’ecole", "je me rends à l’ecole"),
+    ("je vais à l’école", "je me rends à l’école"),
+]
+
+
+def elevate_for_c1(text: str) -> str:
+    """
+    Réécritures plus soutenues pour le niveau C1.
+    """
+    out = text
+    for old, new in C1_REWRITES:
+        out = out.replace(old, new)
+    return out
+
+
+# -------------------------------------------------
+# 2. CONNECTEURS & DÉCOUPAGE DE PHRASES
+# -------------------------------------------------
+
+EASY_CONNECTORS = {
+    "cependant": "mais",
+    "toutefois": "mais",
+    "néanmoins": "mais",
+    "par conséquent": "donc",
+    "en conséquence": "donc",
+    "ainsi": "donc",
+    "tandis que": "alors que",
+    "afin que": "pour que",
+    "afin de": "pour",
+    "lorsque": "quand",
+    "désormais": "maintenant",
+    "nonobstant": "malgré",
+    "attendu que": "parce que",
+}
+
+
+def simplify_connectors(text: str) -> str:
+    """
+    Remplace certains connecteurs plus difficiles par des équivalents plus simples.
+    """
+    return current_rules().replace_connectors(text)
+
+
+def rechunk_sentences(sent_texts: List[str], max_len: int) -> str:
+    """
+    Recoupe chaque phrase aux virgules en morceaux d'au plus `max_len` mots.
+    Les deux moteurs ne diffèrent que par le découpage initial en phrases.
+    """
+    new_sents = []
+
+    for sent_text in sent_texts:
+        parts = [p.strip() for p in sent_text.split(",")]
+        chunk = ""
+
+        for p in parts:
+            if not p:
+                continue
+            p_tokens = p.split()
+            if not p_tokens:
+                continue
+
+            current_len = len(chunk.split()) if chunk else 0
+            if current_len + len(p_tokens) > max_len:
+                if chunk:
+                    new_sents.append(chunk.strip())
+                chunk = p
+            else:
+                chunk = (chunk + ", " + p) if chunk else p
+
+        if chunk:
+            new_sents.append(chunk.strip())
+
+    fixed = []
+    for s in new_sents:
+        s = s.rstrip(",.; ").strip()
+        if not s:
+            continue
+        if s.endswith((".", "!", "?")):
+            fixed.append(s)
+        else:
+            fixed.append(s + ".")
+    return " ".join(fixed)
+
+
+# -------------------------------------------------
+# 3. LEXIQUE : fréquence + substitutions
+# -------------------------------------------------
+
+LEXICAL_SUBSTITUTIONS = {
+    "dichotomie": "différence",
+    "impératif": "très important",
+    "souligner": "dire clairement",
+    "circonspection": "prudence",
+    "prétendre": "dire",
+    "éventualité": "possibilité",
+    "subséquent": "suivant",
+    "tenace": "forte",
+    "outrecuidant": "arrogant",
+    "s'avérer": "être",
+    "conceptuel": "abstrait",
+    # verbes "lourds"
+    "effectuer": "faire",
+    "procéder": "faire",
+    "réaliser": "faire",
+    "conduire": "faire",
+    "considérer": "penser",
+    "susciter": "causer",
+    "déceler": "trouver",
+    "recenser": "compter",
+    "dépourvu": "sans",
+    "subsister": "rester",
+    "interroger": "demander",
+    "exiger": "demander",
+}
+
+# Niveaux concernés et seuil de fréquence (Zipf) des substitutions lexicales
+LEXICAL_LEVELS = {"A1", "A2", "B1"}
+LEXICAL_MAX_ZIPF = 3.5
+
+
+# -------------------------------------------------
+# 4. EXPRESSIONS PHRASEOLOGIQUES (multi-mots)
+# -------------------------------------------------
+
+PHRASAL_SUBSTITUTIONS = {
+    # 1. Expressions argumentatives / académiques
+    "il convient de noter que": "il faut dire que",
+    "il est essentiel de souligner que": "c'est très important de dire que",
+    "il est impératif de": "il faut vraiment",
+    "il va de soi que": "c'est évident que",
+    "il ressort de cette analyse que": "on voit que",
+    "on observe une tendance à": "on voit souvent que",
+    "on peut en déduire que": "on peut comprendre que",
+    "à première vue": "au début",
+    "en d’autres termes": "pour dire simplement",
+    "en d'autres termes": "pour dire simplement",
+    "en définitive": "finalement",
+
+    # 2. Simplification de subordonnées simples
+    "qui est bruyant": "bruyant",
+    "qui est important": "important",
+    "qui est nécessaire": "nécessaire",
+    "qui est essentiel": "essentiel",
+
+    # 3. Expressions juridiques / administratives
+    "l'éloquence de son plaidoyer": "le fait qu'il parle très bien",
+    "l’eloquence de son plaidoyer": "le fait qu'il parle très bien",
+    "l’éloquence de son plaidoyer": "le fait qu'il parle très bien",
+    "documentation exhaustive": "beaucoup de documents",
+    "documentation très exhaustive": "beaucoup de documents",
+    "dissiper le scepticisme": "enlever les doutes",
+    "dissiper le scepticisme initial": "enlever les premiers doutes",
+    "emporter son adhésion": "le convaincre complètement",
+    "emporter l'adhésion du jury": "convaincre complètement le jury",
+    "emporter l’adhésion du jury": "convaincre complètement le jury",
+    "être soumis à une réglementation": "devoir suivre une règle",
+    "être en conformité avec": "respecter",
+    "porter atteinte à": "causer un problème",
+    "être tenu responsable": "être responsable",
+    "faire l'objet de": "être concerné par",
+    "entrer en vigueur": "commencer officiellement",
+
+    # 4. Expressions abstraites / intellectuelles
+    "la dichotomie entre": "la différence entre",
+    "le postulat initial": "l'idée de départ",
+    "le raisonnement sous-jacent": "l'idée cachée",
+    "les implications de ce phénomène": "ce que cela change",
+    "une perspective nuancée": "une idée plus précise",
+    "les enjeux majeurs": "les choses importantes",
+    "les facteurs déterminants": "les choses qui changent tout",
+    "un constat alarmant": "une situation inquiétante",
+    "une approche holistique": "une vision générale",
+    "un contexte favorable": "une bonne situation",
+
+    # 5. Expressions émotionnelles / subjectives
+    "susciter une vive réaction": "faire réagir fortement",
+    "nourrir des inquiétudes": "donner des inquiétudes",
+    "faire preuve de résilience": "être très fort et continuer",
+    "témoigner d’une grande prudence": "être très prudent",
+    "témoigner d'une grande prudence": "être très prudent",
+    "se heurter à un refus": "recevoir un refus",
+    "subir une pression considérable": "avoir beaucoup de pression",
+    "manifester un intérêt marqué": "être très intéressé",
+    "faire preuve d’empathie": "comprendre les autres",
+    "faire preuve d'empathie": "comprendre les autres",
+    "exprimer son désarroi": "dire qu'on est triste ou perdu",
+    "tirer parti de": "utiliser pour avoir un avantage",
+
+    # 6. Expressions techniques / scientifiques
+    "mettre en évidence": "montrer clairement",
+    "effectuer une analyse approfondie": "étudier beaucoup",
+    "formuler une hypothèse": "donner une idée possible",
+    "procéder à une comparaison": "comparer",
+    "un échantillon représentatif": "un groupe qui montre bien la situation",
+    "des données fiables": "des données sûres",
+    "une corrélation significative": "un lien important",
+    "une variation notable": "un changement important",
+    "un résultat probant": "un bon résultat",
+    "une méthodologie rigoureuse": "une façon de travailler organisée",
+
+    # 7. Expressions sociales / économiques
+    "être confronté à une crise": "avoir un gros problème",
+    "accroître la productivité": "travailler mieux",
+    "réduire les disparités": "réduire les différences",
+    "favoriser l'inclusion": "aider tout le monde à participer",
+    "renforcer la cohésion sociale": "aider les gens à bien vivre ensemble",
+    "promouvoir l’égalité des chances": "donner les mêmes chances à tous",
+    "promouvoir l'égalité des chances": "donner les mêmes chances à tous",
+    "stimuler l’économie": "aider les entreprises à mieux travailler",
+    "stimuler l'economie": "aider les entreprises à mieux travailler",
+    "avoir un impact considérable": "changer beaucoup",
+    "contribuer à l’amélioration de": "aider à améliorer",
+    "contribuer à l'amelioration de": "aider à améliorer",
+    "un secteur en pleine expansion": "un secteur qui grandit vite",
+}
+
+# Niveaux concernés par les expressions
+PHRASAL_LEVELS = {"A1", "A2", "B1"}
+
+
+def apply_phrasal_rules(text: str, target_level: Optional[str]) -> str:
+    """
+    Simplification de groupes de mots (expressions figées, tournures académiques).
+    """
+    if target_level is None:
+        return text
+
+    if target_level.upper() not in PHRASAL_LEVELS:
+        return text
+
+    return current_rules().replace_phrases(text)
+
+
+# -------------------------------------------------
+# 5. RÈGLES DE STRUCTURES TYPIQUES (patterns)
+# -------------------------------------------------
+
+ADJ_INTENSITY = {
+    "impératif": "très important",
+    "nécessaire": "important",
+    "essentiel": "très important",
+    "important": "important",
+}
+
+
+_ADJ_RE = re.compile(r"\b[Ii]l est (\w+) de\b")
+_PASSIVE_RE = re.compile(
+    r"\b[Ee]st (effectué|réalisé|conduit|demandé|étudié|analysé) par\b", re.IGNORECASE
+)
+_REPEATED_SUBJECT_RE = re.compile(r"(\b\w+\s+)(et)\s+\1", re.IGNORECASE)
+
+
+def _pattern_stage(adj_intensity: Dict[str, str], target_level: str) -> Callable[[str], str]:
+    """
+    Construit la fonction des règles de structure pour un niveau : les
+    branches qui ne concernent pas ce niveau sont écartées une fois pour toutes.
+    """
+    # --- Règle : "Il est ADJ de" ---
+    if target_level in {"B1", "B2"}:
+        adj_form = "C'est {} de"
+    elif target_level in {"A1", "A2"}:
+        adj_form = "C'est {}. On doit"
+    else:
+        adj_form = None
+
+    def repl_adj(match: re.Match) -> str:
+        adj = match.group(1).lower()
+        return adj_form.format(adj_intensity.get(adj, adj))
+
+    # Passif simple pour A1/A2
+    passive = target_level in {"A1", "A2"}
+
+    def run(text: str) -> str:
+        if adj_form:
+            text = _ADJ_RE.sub(repl_adj, text)
+        if passive:
+            text = _PASSIVE_RE.sub("est fait par", text)
+        # Cas très simple de sujet répété
+        return _REPEATED_SUBJECT_RE.sub(r"\1\2 ", text)
+
+    return run
+
+
+def apply_pattern_rules(text: str, target_level: Optional[str]) -> str:
+    """
+    Règles générales sur des structures typiques fréquentes.
+    """
+    if target_level is None:
+        return text
+
+    return _pattern_stage(current_rules().adj_intensity, target_level.upper())(text)
+
+
+# -------------------------------------------------
+# 6. CONFIG NIVEAUX & STRATÉGIES
+# -------------------------------------------------
+
+LEVEL_CONFIG = {
+    "A1": {"mode": "strong", "max_len": 8},
+    "A2": {"mode": "strong", "max_len": 12},
+    "B1": {"mode": "standard", "max_len": 18},
+    "B2": {"mode": "standard", "max_len": 22},
+    "C1": {"mode": "light", "max_len": 30},
+}
+
+# Mode automatique : niveau détecté -> niveau cible
+AUTO_TARGET_LEVEL = {
+    "C1": "B2",
+    "B2": "B1",
+    "B1": "A2",
+    "A2": "A2",
+    "A1": "A1",
+}
+
+
+def resolve_strategy(
+    original_text: str,
+    mode: str,
+    strategy: str,
+    target: Optional[str],
+    analyze: Callable[[str], Dict[str, Any]],
+):
+    """
+    Calcule le niveau cible et les paramètres de simplification.
+    `analyze` fournit le niveau estimé en mode automatique (analyse spaCy
+    pour le moteur complet, analyse lite sinon).
+    """
+    mode = (mode or "standard").lower()
+    strategy = (strategy or "auto").lower()
+    target = target.upper() if target else None
+
+    # 1) Niveau explicitement choisi
+    if strategy == "target" and target in LEVEL_CONFIG:
+        conf = LEVEL_CONFIG[target]
+        internal_mode = conf["mode"]
+        max_len = conf["max_len"]
+
+        if target == "C1":
+            explanation = "Simplification vers C1 (style soutenu)."
+        else:
+            explanation = f"Simplification vers {target}."
+
+        return internal_mode, target, max_len, explanation
+
+    # 2) Mode automatique
+    if strategy == "auto":
+        stats = analyze(original_text)
+        orig_level = stats.get("estimated_level", "B1")
+        target_level = AUTO_TARGET_LEVEL.get(orig_level, "B1")
+        conf = LEVEL_CONFIG[target_level]
+        internal_mode = conf["mode"]
+        max_len = conf["max_len"]
+
+        explanation = f"Mode automatique : détecté {orig_level} -> cible {target_level}."
+        return internal_mode, target_level, max_len, explanation
+
+    # 3) Fallback
+    return mode, "B1", 22, "Simplification basique (fallback B1)."
+
+
+
+
+# -------------------------------------------------
+# 7. RÈGLES COMPILÉES & PLANS PAR NIVEAU
+# -------------------------------------------------
+# Les tables sont compilées une seule fois en expressions régulières, puis
+# chaque couple (moteur, mode, niveau, longueur) reçoit un plan figé : la
+# liste des étapes qui s'appliquent vraiment à ce niveau. Une requête ne
+# fait plus que dérouler son plan.
+
+# Fichier JSON optionnel surchargeant les tables ("connectors", "lexical",
+# "phrasal", "adj_intensity"), relu à chaud quand il change sur le disque
+RULES_FILE = os.environ.get("EDUSIMPLIFY_RULES_FILE")
+
+# Intervalle minimal (secondes) entre deux vérifications du fichier
+RULES_RELOAD_INTERVAL = 5.0
+
+
+def _compile_table(table: Dict[str, str], keep_case: bool = False):
+    """
+    Une expression par clé, appliquées dans l'ordre du dictionnaire comme
+    auparavant. La clé en minuscules sert de pré-filtre : la plupart des
+    clés sont absentes d'un texte donné et ne coûtent qu'un `in`.
+    """
+    compiled = []
+    for key, replacement in table.items():
+        pattern = re.compile(r"\b" + re.escape(key) + r"\b", re.IGNORECASE)
+        if keep_case:
+            def repl(m, easy=replacement):
+                return easy.capitalize() if m.group(0)[0].isupper() else easy
+        else:
+            # fonction plutôt que chaîne : pas d'interprétation des "\1"
+            def repl(m, easy=replacement):
+                return easy
+        compiled.append((key.lower(), pattern, repl))
+    return compiled
+
+
+def _run_table(compiled, text: str) -> str:
+    lowered = text.lower()
+    for key, pattern, repl in compiled:
+        if key in lowered:
+            text = pattern.sub(repl, text)
+            lowered = text.lower()
+    return text
+
+
+class RuleSet:
+    """
+    Tables de substitution et leurs expressions compilées. Immuable : un
+    rechargement construit un nouveau RuleSet.
+    """
+
+    def __init__(
+        self,
+        connectors: Dict[str, str],
+        lexical: Dict[str, str],
+        phrasal: Dict[str, str],
+        adj_intensity: Dict[str, str],
+    ):
+        self.connectors = dict(connectors)
+        self.lexical = dict(lexical)
+        self.phrasal = dict(phrasal)
+        self.adj_intensity = dict(adj_intensity)
+        self._connectors = _compile_table(self.connectors, keep_case=True)
+        self._phrasal = _compile_table(self.phrasal)
+
+    def replace_connectors(self, text: str) -> str:
+        return _run_table(self._connectors, text)
+
+    def replace_phrases(self, text: str) -> str:
+        return _run_table(self._phrasal, text)
+
+
+class RulePlan:
+    """
+    Suite figée des étapes à appliquer pour un niveau donné.
+    """
+
+    __slots__ = ("engine", "mode", "level", "max_len", "stages")
+
+    def __init__(self, engine: str, mode: str, level: str, max_len: int, stages):
+        self.engine = engine
+        self.mode = mode
+        self.level = level
+        self.max_len = max_len
+        self.stages: Tuple[Tuple[str, Callable[[str], str]], ...] = tuple(stages)
+
+    @property
+    def stage_names(self) -> List[str]:
+        return [name for name, _ in self.stages]
+
+    def run(self, text: str) -> str:
+        for _, stage in self.stages:
+            text = stage(text)
+        return text.strip()
+
+
+# Moteurs : étape lexicale (texte, RuleSet) et découpage (texte, max_len).
+# simplify.py enregistre "rules" (spaCy), lite.py enregistre "lite".
+_ENGINES: Dict[str, Tuple[Callable[[str, RuleSet], str], Callable[..., str]]] = {}
+
+
+def register_engine(
+    name: str,
+    lexical: Callable[[str, RuleSet], str],
+    split: Callable[..., str],
+) -> None:
+    """
+    Déclare un moteur et compile d'avance ses plans pour LEVEL_CONFIG.
+    """
+    _ENGINES[name] = (lexical, split)
+    rules, plans = _compiled
+    for key in [k for k in plans if k[0] == name]:
+        del plans[key]
+    _precompile(rules, plans, [name])
+
+
+def build_plan(rules: RuleSet, engine: str, mode: str, level: str, max_len: int) -> RulePlan:
+    """
+    Sélectionne une fois pour toutes les étapes utiles au niveau, dans
+    l'ordre historique : connecteurs, patterns, expressions, lexique,
+    découpage, style C1.
+    """
+    lexical, split = _ENGINES[engine]
+    stages = [("connectors", rules.replace_connectors)]
+    stages.append(("patterns", _pattern_stage(rules.adj_intensity, level)))
+    if level in PHRASAL_LEVELS:
+        stages.append(("phrasal", rules.replace_phrases))
+    if mode == "strong" and level in LEXICAL_LEVELS:
+        stages.append(("lexical", lambda text: lexical(text, rules)))
+    if mode in {"standard", "strong"}:
+        stages.append(("split", lambda text: split(text, max_len=max_len)))
+    if level == "C1":
+        stages.append(("c1", elevate_for_c1))
+    return RulePlan(engine, mode, level, max_len, stages)
+
+
+def _precompile(rules: RuleSet, plans: Dict, engines) -> None:
+    for engine in engines:
+        for level, conf in LEVEL_CONFIG.items():
+            key = (engine, conf["mode"], level, conf["max_len"])
+            plans[key] = build_plan(rules, *key)
+
+
+def _default_rules() -> RuleSet:
+    return RuleSet(EASY_CONNECTORS, LEXICAL_SUBSTITUTIONS, PHRASAL_SUBSTITUTIONS, ADJ_INTENSITY)
+
+
+def _load_rules_file(path: str) -> RuleSet:
+    with open(path, encoding="utf-8") as f:
+        overrides = json.load(f)
+    return RuleSet(
+        dict(EASY_CONNECTORS, **overrides.get("connectors", {})),
+        dict(LEXICAL_SUBSTITUTIONS, **overrides.get("lexical", {})),
+        dict(PHRASAL_SUBSTITUTIONS, **overrides.get("phrasal", {})),
+        dict(ADJ_INTENSITY, **overrides.get("adj_intensity", {})),
+    )
+
+
+# (règles, plans) : remplacés ensemble, en une seule affectation, au rechargement
+_compiled: Tuple[RuleSet, Dict[Tuple[str, str, str, int], RulePlan]] = (_default_rules(), {})
+_reload_lock = threading.Lock()
+_rules_mtime: Optional[float] = None
+_next_check = 0.0
+
+
+def current_rules() -> RuleSet:
+    _maybe_reload()
+    return _compiled[0]
+
+
+def reload_plans(path: Optional[str] = None) -> bool:
+    """
+    Recompile les tables (avec les surcharges du fichier si fourni) et tous
+    les plans. En cas d'erreur, les règles en place sont conservées.
+    """
+    global _compiled, _rules_mtime
+    path = path or RULES_FILE
+    try:
+        if path:
+            mtime = os.path.getmtime(path)
+            rules = _load_rules_file(path)
+        else:
+            mtime = None
+            rules = _default_rules()
+    except Exception as e:
+        print(f"[RULES ERROR] {path}: {e}")
+        return False
+
+    plans: Dict[Tuple[str, str, str, int], RulePlan] = {}
+    _precompile(rules, plans, list(_ENGINES))
+    # les requêtes en cours finissent leur plan avec les anciennes règles
+    _compiled, _rules_mtime = (rules, plans), mtime
+    return True
+
+
+def _maybe_reload() -> None:
+    global _next_check, _rules_mtime
+    if not RULES_FILE:
+        return
+    now = time.monotonic()
+    if now < _next_check or not _reload_lock.acquire(blocking=False):
+        return
+    try:
+        _next_check = now + RULES_RELOAD_INTERVAL
+        try:
+            mtime = os.path.getmtime(RULES_FILE)
+        except OSError as e:
+            print(f"[RULES ERROR] {RULES_FILE}: {e}")
+            return
+        if mtime != _rules_mtime:
+            # un fichier invalide n'est relu qu'à sa prochaine modification
+            _rules_mtime = mtime
+            reload_plans(RULES_FILE)
+    finally:
+        _reload_lock.release()
+
+
+def get_plan(engine: str, mode: str, level: str, max_len: int) -> RulePlan:
+    """
+    Plan d'exécution pour (moteur, mode, niveau, longueur max). Les
+    combinaisons de LEVEL_CONFIG sont compilées d'avance ; les autres
+    (mode de repli) le sont à la première demande.
+    """
+    _maybe_reload()
+    rules, plans = _compiled
+    key = (engine, mode, level, max_len)
+    plan = plans.get(key)
+    if plan is None:
+        plan = plans[key] = build_plan(rules, *key)
+    return plan
+
+
+def apply_rules(
+    text: str,
+    internal_mode: str,
+    target_level: str,
+    max_len: int,
+    engine: str = "rules",
+) -> str:
+    """
+    Enchaîne les règles dans l'ordre du pipeline historique, selon le plan
+    du niveau cible.
+    """
+    return get_plan(engine, internal_mode, target_level, max_len).run(text)
+
+
+if RULES_FILE:
+    reload_plans(RULES_FILE)
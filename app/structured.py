@@ -0,0 +1,248 @@
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+# -------------------------------------------------
+# 0. SCHÉMAS JSON DES RÉPONSES LLM
+# -------------------------------------------------
+
+CEFR_LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+# Réponse de /simplify (main.py). Passé tel quel dans le champ `format`
+# d'Ollama, qui contraint alors la génération à ce schéma.
+SIMPLIFY_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "detected_level": {"type": "string", "enum": CEFR_LEVELS},
+        "target_level": {"type": "string"},
+        "simplified_text": {"type": "string"},
+        "cefr_explanation": {"type": "string"},
+        "level_explanation": {"type": "string"},
+        "simplification_strategy": {"type": "string"},
+    },
+    "required": ["detected_level", "simplified_text"],
+}
+
+# Réponse groupée du micro-batcher
+BATCH_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "simplified": {"type": "string"},
+                },
+                "required": ["index", "simplified"],
+            },
+        },
+    },
+    "required": ["items"],
+}
+
+
+# Réponse groupée de /simplify (main.py) : un objet SIMPLIFY_SCHEMA par texte
+JSON_BATCH_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"index": {"type": "integer"}, **SIMPLIFY_SCHEMA["properties"]},
+                "required": ["index"] + SIMPLIFY_SCHEMA["required"],
+            },
+        },
+    },
+    "required": ["items"],
+}
+
+
+# -------------------------------------------------
+# 1. ANALYSE TOLÉRANTE
+# -------------------------------------------------
+
+def _scan(text: str):
+    """
+    Parcourt `text` à partir de la première accolade et renvoie
+    (fragment, pile des ouvrants non fermés, début de la chaîne non terminée
+    ou -1). S'arrête dès que l'objet de premier niveau est fermé : le texte
+    qui suit (prose, commentaires) est ignoré.
+    """
+    start = text.find("{")
+    if start < 0:
+        return "", [], -1
+
+    stack: List[str] = []
+    str_start = -1
+    esc = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if str_start >= 0:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                str_start = -1
+        elif ch == '"':
+            str_start = i - start
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1], [], -1
+
+    return text[start:], stack, str_start
+
+
+def _repair(fragment: str, stack: List[str], str_start: int) -> Optional[Dict[str, Any]]:
+    """
+    Ferme une sortie tronquée (tableaux, objets) et tente de la décoder.
+    Une chaîne interrompue est retirée plutôt que refermée : une valeur
+    coupée en plein milieu ne doit pas passer pour une valeur complète
+    (elle devient null, ou disparaît si c'était une clé).
+    """
+    if str_start >= 0:
+        fragment = fragment[:str_start]
+    closers = "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+    body = fragment.rstrip()
+    candidates = [body + closers]
+    if body.endswith(","):
+        candidates.append(body[:-1] + closers)
+    if body.endswith(":"):
+        candidates.append(body + " null" + closers)
+    if "," in body:
+        # littéral coupé (ex: `tru`, `12.`) : on revient au dernier élément complet
+        candidates.append(body[:body.rfind(",")] + closers)
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+_FIELD_RE = re.compile(r'"([A-Za-z_][A-Za-z0-9_]*)"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def _extract_fields(text: str) -> Dict[str, Any]:
+    """
+    Dernier recours : récupère les paires "clé": "valeur" dont la chaîne
+    est complète, même si le reste du JSON est invalide.
+    """
+    fields: Dict[str, Any] = {}
+    for key, raw in _FIELD_RE.findall(text):
+        try:
+            value = json.loads('"' + raw + '"')
+        except ValueError:
+            value = raw
+        fields.setdefault(key, value)
+    return fields
+
+
+def parse_tolerant(text: str) -> Dict[str, Any]:
+    """
+    Décode un objet JSON produit par un LLM en tolérant :
+    - de la prose ou des balises ``` avant/après l'objet ;
+    - une sortie tronquée (tableaux ou objets non fermés) : les champs
+      complets sont conservés, la valeur coupée est écartée ;
+    - à défaut, un JSON illisible dont on récupère les champs texte.
+    Renvoie {} si rien n'est exploitable.
+    """
+    text = text or ""
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data
+    except ValueError:
+        pass
+
+    fragment, stack, str_start = _scan(text)
+    if fragment:
+        if not stack and str_start < 0:
+            try:
+                data = json.loads(fragment)
+                if isinstance(data, dict):
+                    return data
+            except ValueError:
+                pass
+        else:
+            data = _repair(fragment, stack, str_start)
+            if data is not None:
+                return data
+
+    return _extract_fields(text)
+
+
+def missing_required(data: Dict[str, Any], schema: Dict[str, Any]) -> List[str]:
+    """
+    Liste les champs obligatoires du schéma absents ou vides dans `data`.
+    """
+    missing = []
+    for key in schema.get("required", []):
+        value = data.get(key)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            missing.append(key)
+    return missing
+
+
+class IncrementalJSONParser:
+    """
+    Suit une sortie LLM au fil du streaming, caractère par caractère, sans
+    jamais réanalyser ce qui a déjà été lu. `feed` renvoie True dès que
+    l'objet JSON de premier niveau est fermé : le texte qui suit est
+    ignoré, et la lecture est coupée si le modèle continue d'émettre
+    (certains émettent des espaces jusqu'à la limite de tokens).
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self.schema = schema or {}
+        self.closed = False
+        self._parts: List[str] = []
+        self._depth = 0
+        self._started = False
+        self._in_str = False
+        self._esc = False
+
+    def feed(self, chunk: str) -> bool:
+        self._parts.append(chunk)
+        for ch in chunk:
+            if self.closed:
+                break
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+            elif ch == '"':
+                self._in_str = self._started
+            elif ch == "{" or (ch == "[" and self._started):
+                self._started = True
+                self._depth += 1
+            elif ch in "}]" and self._started:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.closed = True
+        return self.closed
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Champs déjà générés (réparés si la sortie est incomplète)."""
+        return parse_tolerant(self.text)
+
+    def missing(self) -> List[str]:
+        return missing_required(self.snapshot(), self.schema)
@@ -0,0 +1,394 @@
+import contextvars
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Au-delà de cette durée de chargement, on compte un chargement de modèle
+# (en dessous, Ollama avait déjà le modèle en mémoire)
+LOAD_EVENT_THRESHOLD = 0.5  # secondes
+
+HISTOGRAM_BUCKETS: Dict[str, List[float]] = {
+    "llm_prompt_tokens": [16, 32, 64, 128, 256, 512, 1024, 2048, 4096],
+    "llm_output_tokens": [16, 32, 64, 128, 256, 512, 1024, 2048, 4096],
+    "llm_tokens_per_second": [1, 2, 5, 10, 20, 40, 80, 160],
+    "llm_prompt_eval_seconds": [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10],
+    "llm_eval_seconds": [0.25, 0.5, 1, 2, 5, 10, 20, 30, 60],
+    "llm_load_seconds": [0.5, 1, 2, 5, 10, 30, 60],
+}
+
+# Valeurs admises pour l'étiquette `target_level` ; le reste devient "other"
+# (valeur fournie par le client : chaque nouvelle valeur créerait des
+# histogrammes jamais libérés)
+METRIC_LEVELS = {"A1", "A2", "B1", "B2", "C1", "C2"}
+
+# Répertoire partagé par les workers (serve.py) : chacun y publie ses
+# compteurs, et /metrics les additionne. Vide = métriques du seul processus.
+METRICS_DIR = os.environ.get("EDUSIMPLIFY_METRICS_DIR", "")
+
+# Identifiant de la requête HTTP en cours (posé par le middleware)
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Requêtes servies par la génération groupée en cours (micro-batching)
+batch_request_ids_var: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "batch_request_ids", default=None
+)
+
+logger = logging.getLogger("edusimplify.llm")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def new_request_id(incoming: Optional[str] = None) -> str:
+    """Reprend l'identifiant fourni par le client (X-Request-ID) ou en crée un."""
+    return incoming or uuid.uuid4().hex
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI : pose request_id_var pour toute la requête et renvoie
+    l'en-tête X-Request-ID. Écrit en ASGI pur plutôt qu'avec
+    @app.middleware("http") (BaseHTTPMiddleware), qui masque la
+    déconnexion du client à request.is_disconnected() et empêche donc
+    d'annuler la génération.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = new_request_id(incoming)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
+
+
+def metric_level(target_level: Optional[str]) -> str:
+    """Ex: "a2 (Elementary)" -> "A2" ; absent -> "none" ; inconnu -> "other"."""
+    words = (target_level or "").split()
+    if not words:
+        return "none"
+    code = words[0].upper()
+    return code if code in METRIC_LEVELS else "other"
+
+
+def _label(value: str) -> str:
+    """Échappement d'une valeur d'étiquette Prometheus."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# -------------------------------------------------
+# 1. HISTOGRAMMES
+# -------------------------------------------------
+
+class _Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # dernier = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, str, str], _Histogram] = {}
+_counters: Dict[Tuple[str, str, str], int] = {}
+
+
+def _observe(name: str, model: str, level: str, value: float) -> None:
+    key = (name, model, level)
+    hist = _histograms.get(key)
+    if hist is None:
+        hist = _histograms[key] = _Histogram(HISTOGRAM_BUCKETS[name])
+    hist.observe(value)
+
+
+def _increment(name: str, model: str, level: str) -> None:
+    key = (name, model, level)
+    _counters[key] = _counters.get(key, 0) + 1
+
+
+# Jauges lues au moment de l'export (RSS, taille du vocabulaire spaCy...)
+_gauges: Dict[str, Callable[[], float]] = {}
+
+
+def register_gauge(name: str, read: Callable[[], float]) -> None:
+    """Enregistre une jauge dont la valeur est lue à chaque export."""
+    _gauges[name] = read
+
+
+def process_rss_bytes() -> int:
+    """
+    Mémoire résidente actuelle du processus. Lue dans /proc (Linux) ; à
+    défaut, pic de RSS fourni par getrusage.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+register_gauge("process_resident_memory_bytes", process_rss_bytes)
+
+
+# -------------------------------------------------
+# 2. ENREGISTREMENT D'UN APPEL
+# -------------------------------------------------
+
+def llm_stats(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extrait les compteurs d'une réponse Ollama (durées en nanosecondes)
+    et les convertit en tokens et secondes. Un champ absent de la réponse
+    (ex: génération interrompue avant la fin) vaut None.
+    """
+    def seconds(key: str) -> Optional[float]:
+        value = response.get(key)
+        return round(value / 1e9, 4) if value is not None else None
+
+    output_tokens = response.get("eval_count")
+    eval_time = seconds("eval_duration")
+    load = seconds("load_duration")
+    return {
+        "prompt_tokens": response.get("prompt_eval_count"),
+        "output_tokens": output_tokens,
+        "prompt_eval_seconds": seconds("prompt_eval_duration"),
+        "eval_seconds": eval_time,
+        "load_seconds": load,
+        "tokens_per_second": round(output_tokens / eval_time, 2) if output_tokens and eval_time else None,
+        "model_loaded": load is not None and load >= LOAD_EVENT_THRESHOLD,
+    }
+
+
+def record_llm_call(
+    response: Dict[str, Any],
+    model: str,
+    target_level: Optional[str],
+    endpoint: str,
+    wall_seconds: float,
+    prompt_template: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Agrège les statistiques d'un appel et écrit une ligne de log JSON
+    rattachée à l'identifiant de requête courant (ou, pour une génération
+    groupée, à la liste `request_ids` des requêtes du lot). Renvoie les
+    statistiques.
+    """
+    stats = llm_stats(response)
+    model = model or "unknown"
+    level = metric_level(target_level)
+
+    observed = {
+        "llm_prompt_tokens": stats["prompt_tokens"],
+        "llm_output_tokens": stats["output_tokens"],
+        "llm_prompt_eval_seconds": stats["prompt_eval_seconds"],
+        "llm_eval_seconds": stats["eval_seconds"],
+        "llm_tokens_per_second": stats["tokens_per_second"],
+    }
+
+    with _lock:
+        _increment("llm_requests_total", model, level)
+        for name, value in observed.items():
+            if value is not None:
+                _observe(name, model, level, value)
+        if stats["model_loaded"]:
+            _increment("llm_model_loads_total", model, level)
+            _observe("llm_load_seconds", model, level, stats["load_seconds"])
+
+    batch_ids = batch_request_ids_var.get()
+    logger.info(
+        json.dumps(
+            {
+                "event": "llm_call",
+                "ts": round(time.time(), 3),
+                "request_id": request_id_var.get() if batch_ids is None else None,
+                **({"request_ids": batch_ids} if batch_ids is not None else {}),
+                "endpoint": endpoint,
+                "model": model,
+                "target_level": level,
+                "prompt_template": prompt_template,
+                "wall_seconds": round(wall_seconds, 4),
+                **stats,
+            },
+            ensure_ascii=False,
+        )
+    )
+    publish_metrics()
+    return stats
+
+
+# -------------------------------------------------
+# 3. PARTAGE ENTRE WORKERS
+# -------------------------------------------------
+
+def share_metrics(directory: str) -> None:
+    """
+    Publie désormais les métriques de ce processus dans `directory`, et les
+    additionne à celles des autres processus à l'export. Appelé par le maître
+    de serve.py avant le fork ; les workers en héritent.
+    """
+    global METRICS_DIR
+    METRICS_DIR = directory
+
+
+def _read_gauges() -> Dict[str, float]:
+    values = {}
+    for name, read in sorted(_gauges.items()):
+        try:
+            values[name] = read()
+        except Exception as e:
+            print(f"[METRICS ERROR] {name}: {e}")
+    return values
+
+
+def _snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "counters": [[*key, value] for key, value in _counters.items()],
+            "histograms": [[*key, h.counts, h.sum, h.count] for key, h in _histograms.items()],
+        }
+
+
+def publish_metrics() -> None:
+    """Écrit les métriques de ce processus dans METRICS_DIR/<pid>.json."""
+    if not METRICS_DIR:
+        return
+    data = dict(_snapshot(), gauges=_read_gauges())
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=f"{os.getpid()}.", suffix=".tmp", dir=METRICS_DIR)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"[METRICS ERROR] {path}: {e}")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _other_processes() -> List[Tuple[int, Dict[str, Any]]]:
+    published = []
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.json")):
+        name = os.path.basename(path)[: -len(".json")]
+        if not name.isdigit() or int(name) == os.getpid():
+            continue
+        pid = int(name)
+        try:
+            with open(path) as f:
+                published.append((pid, json.load(f)))
+        except (OSError, ValueError) as e:
+            print(f"[METRICS ERROR] {path}: {e}")
+    return published
+
+
+# -------------------------------------------------
+# 4. EXPORT (FORMAT TEXTE PROMETHEUS)
+# -------------------------------------------------
+
+def render_metrics() -> str:
+    """
+    Exporte jauges, compteurs et histogrammes au format texte Prometheus,
+    avec les étiquettes `model` et `target_level`.
+
+    Avec METRICS_DIR (serve.py), compteurs et histogrammes sont la somme de
+    tous les workers, y compris ceux qui ont été relancés depuis ; les jauges
+    sont données par worker vivant (étiquette `pid`).
+    """
+    snapshot = _snapshot()
+    counters: Dict[Tuple[str, str, str], int] = {}
+    histograms: Dict[Tuple[str, str, str], Tuple[List[int], float, int]] = {}
+    gauges: List[Tuple[str, str, float]] = []
+    processes = [(os.getpid(), dict(snapshot, gauges=_read_gauges()))]
+    if METRICS_DIR:
+        processes += _other_processes()
+
+    for pid, data in processes:
+        labels = f'{{pid="{pid}"}}' if METRICS_DIR else ""
+        if pid == os.getpid() or _pid_alive(pid):
+            gauges += [(name, labels, value) for name, value in data["gauges"].items()]
+        for name, model, level, value in data["counters"]:
+            key = (name, model, level)
+            counters[key] = counters.get(key, 0) + value
+        for name, model, level, counts, total, count in data["histograms"]:
+            key = (name, model, level)
+            if key in histograms:
+                old_counts, old_total, old_count = histograms[key]
+                counts = [a + b for a, b in zip(old_counts, counts)]
+                total, count = old_total + total, old_count + count
+            histograms[key] = (counts, total, count)
+
+    lines: List[str] = []
+    for name in sorted({g[0] for g in gauges}):
+        lines.append(f"# TYPE {name} gauge")
+        for n, labels, value in sorted(gauges):
+            if n == name:
+                lines.append(f"{name}{labels} {value}")
+
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (n, model, level), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f'{name}{{model="{_label(model)}",target_level="{level}"}} {value}')
+
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (n, model, level), (counts, total, count) in sorted(histograms.items()):
+            if n != name:
+                continue
+            labels = f'model="{_label(model)}",target_level="{level}"'
+            cumulative = 0
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS[name] + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
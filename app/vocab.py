@@ -0,0 +1,84 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Mode mémoire stable : chaque analyse spaCy se fait dans une "memory zone",
+# les chaînes et lexèmes ajoutés au Vocab pendant l'appel sont libérés à la
+# sortie. Sans cela, chaque mot inconnu (nom propre, faute de frappe, URL...)
+# reste dans le StringStore jusqu'à l'arrêt du processus.
+# Désactivé par défaut : les zones imposent de sérialiser tous les appels
+# spaCy du processus (voir _zone_lock), ce qui divise le débit des workers
+# multi-threads. Sous serve.py, la croissance du Vocab est bornée par le
+# recyclage des workers (EDUSIMPLIFY_MAX_RSS_MB, prefork.py).
+MEMORY_ZONES_ENABLED = os.environ.get("EDUSIMPLIFY_NLP_MEMORY_ZONES", "0") == "1"
+
+# Un mot vu pour la première fois dans une zone n'entre jamais durablement
+# dans le Vocab : son lexème serait recréé à chaque requête. On charge donc
+# une fois pour toutes les N mots français les plus fréquents (wordfreq),
+# ce qui borne le vocabulaire permanent ; seuls les mots rares restent
+# temporaires.
+VOCAB_PRIME_WORDS = int(os.environ.get("EDUSIMPLIFY_VOCAB_PRIME_WORDS", "20000"))
+
+# Le Vocab est partagé par tous les threads : une zone ouverte par un thread
+# libérerait aussi les chaînes créées au même moment par un autre. Les appels
+# spaCy sont donc sérialisés quand les zones sont activées : une requête
+# attend la fin de l'analyse des autres, même sur un worker peu chargé.
+_zone_lock = threading.RLock()
+_local = threading.local()
+
+
+# -------------------------------------------------
+# 1. ZONE MÉMOIRE
+# -------------------------------------------------
+
+@contextmanager
+def nlp_zone(nlp) -> Iterator[None]:
+    """
+    Ouvre une memory zone sur `nlp` (spaCy >= 3.8). Les Doc/Token créés dans
+    le bloc ne doivent pas en sortir : on n'en extrait que des str, int...
+    Les zones imbriquées (ex: analyze_text -> _compute_word_difficulty) se
+    fondent dans la zone la plus externe.
+    """
+    if not MEMORY_ZONES_ENABLED or not hasattr(nlp, "memory_zone"):
+        yield
+        return
+
+    with _zone_lock:
+        depth = getattr(_local, "depth", 0)
+        _local.depth = depth + 1
+        try:
+            if depth:
+                yield
+            else:
+                with nlp.memory_zone():
+                    yield
+        finally:
+            _local.depth = depth
+
+
+def prime_vocab(nlp, n: int = VOCAB_PRIME_WORDS) -> None:
+    """
+    Ajoute au Vocab permanent, et au cache du tokenizer, les `n` mots les
+    plus fréquents (forme minuscule et capitalisée). À appeler au
+    chargement, hors de toute zone.
+    """
+    if not MEMORY_ZONES_ENABLED or n <= 0:
+        return
+    from wordfreq import top_n_list
+
+    words = top_n_list("fr", n)
+    # passer par le tokenizer remplit aussi son cache (désactivé en zone)
+    for i in range(0, len(words), 1000):
+        batch = words[i:i + 1000]
+        nlp.make_doc(" ".join(batch + [w.capitalize() for w in batch]))
+
+
+def vocab_size(nlp) -> int:
+    """Nombre de chaînes actuellement dans le StringStore."""
+    return len(nlp.vocab.strings)
+
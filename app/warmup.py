@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from .llm import OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT, pool
+
+# -------------------------------------------------
+# 0. CONFIGURATION
+# -------------------------------------------------
+
+# Intervalle (secondes) entre deux pings de maintien en mémoire.
+# Doit rester inférieur au keep_alive configuré côté Ollama.
+KEEP_ALIVE_PING_INTERVAL = float(os.environ.get("OLLAMA_PING_INTERVAL", "240"))
+
+# Intervalle de nouvelle tentative tant qu'un modèle n'a pas pu être chargé
+WARMUP_RETRY_INTERVAL = 10.0
+
+# Phrase courte utilisée pour chauffer les pipelines spaCy
+WARMUP_TEXT = "Je vais à l'école. Cependant, il est nécessaire de partir tôt."
+
+
+# -------------------------------------------------
+# 1. ÉTAT DE DISPONIBILITÉ
+# -------------------------------------------------
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {
+    "spacy": False,
+    "models": {},  # nom du modèle -> bool (chargé dans Ollama)
+    "errors": {},
+}
+
+
+def _set(component: str, ok: bool, error: str = "") -> None:
+    with _lock:
+        if component == "spacy":
+            _state["spacy"] = ok
+        else:
+            _state["models"][component] = ok
+        if ok:
+            _state["errors"].pop(component, None)
+        elif error:
+            _state["errors"][component] = error
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    Renvoie l'état courant :
+    {"ready": bool, "spacy": bool, "models": {...}, "errors": {...}, "backends": [...]}
+    `ready` n'est vrai que si spaCy et tous les modèles attendus sont chauds.
+    """
+    with _lock:
+        models = dict(_state["models"])
+        ready = _state["spacy"] and bool(models) and all(models.values())
+        state = {
+            "ready": ready,
+            "spacy": _state["spacy"],
+            "models": models,
+            "errors": dict(_state["errors"]),
+        }
+    state["backends"] = pool.status()
+    return state
+
+
+# -------------------------------------------------
+# 2. CHAUFFE DES MODÈLES
+# -------------------------------------------------
+
+def warm_spacy() -> None:
+    """
+    Charge les pipelines spaCy (import de cefr/simplify) et fait passer
+    un texte court dans chacun pour initialiser les caches internes.
+    """
+    try:
+        from .cefr import analyze_text
+        from .simplify import nlp
+
+        analyze_text(WARMUP_TEXT)
+        nlp(WARMUP_TEXT)
+        _set("spacy", True)
+    except Exception as e:
+        print(f"[WARMUP ERROR] spaCy: {e}")
+        _set("spacy", False, str(e))
+
+
+def warm_llm(model: str) -> bool:
+    """
+    Demande à chaque backend Ollama du pool de charger le modèle en mémoire.
+    Une requête /api/generate sans prompt charge le modèle sans rien générer.
+    Le modèle est considéré prêt dès qu'au moins un backend l'a chargé.
+    """
+    payload = {"model": model, "stream": False, "keep_alive": OLLAMA_KEEP_ALIVE}
+    hot = 0
+    error = ""
+    for backend in pool.backends:
+        try:
+            pool.post_to(backend, "/api/generate", payload, timeout=OLLAMA_TIMEOUT)
+            hot += 1
+        except Exception as e:
+            print(f"[WARMUP ERROR] {model} @ {backend.url}: {e}")
+            error = str(e)
+    _set(model, hot > 0, error)
+    return hot == len(pool.backends)
+
+
+def _keep_alive_loop(models: List[str], interval: float, all_hot: bool) -> None:
+    while True:
+        time.sleep(interval if all_hot else min(interval, WARMUP_RETRY_INTERVAL))
+        all_hot = all([warm_llm(model) for model in models])
+
+
+def start_warmup(models: List[str], spacy_pipelines: bool = True) -> threading.Thread:
+    """
+    Lance la chauffe en arrière-plan puis les pings périodiques de keep-alive.
+    Le serveur répond déjà à /healthz pendant ce temps ; /readyz passe à 200
+    une fois tout chargé.
+    """
+    with _lock:
+        for model in models:
+            _state["models"].setdefault(model, False)
+        if not spacy_pipelines:
+            _state["spacy"] = True
+
+    pool.start_health_checks()
+
+    def run():
+        if spacy_pipelines:
+            warm_spacy()
+        all_hot = all([warm_llm(model) for model in models])
+        _keep_alive_loop(models, KEEP_ALIVE_PING_INTERVAL, all_hot)
+
+    thread = threading.Thread(target=run, name="edusimplify-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,76 +1,310 @@
 import uvicorn
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import requests
+import asyncio
 import json
+import os
+import time
+
+from app.admission import (
+    REQUEST_DEADLINE,
+    AdmissionController,
+    ClientDisconnected,
+    Overloaded,
+    run_until_disconnect,
+)
+from app.backends import DeadlineExceeded
+from app.batching import BATCHING_ENABLED, JSON_BATCH, MicroBatcher
+from app.jobs import JobStore, JobWorkers
+from app.lite import LITE_ENGINE
+from app.llm import ollama_post, pool
+from app.prompts import SIMPLIFY_JSON, PromptTooLong, check_budget
+from app.routing import choose_model, routed_models
+from app.structured import SIMPLIFY_SCHEMA, IncrementalJSONParser, missing_required, parse_tolerant
+from app.telemetry import RequestIdMiddleware, render_metrics
+from app.warmup import readiness, start_warmup
+
+# One retry when the output is unusable (required fields missing)
+MAX_GENERATION_ATTEMPTS = 2
 
 app = FastAPI()
 
+# Bounded admission: at most OLLAMA_MAX_INFLIGHT generations per available
+# backend. The limit is per process; serve.py workers do not share it.
+admission = AdmissionController(pool.capacity)
+
+# Persistent queue for long simplifications (POST /jobs)
+job_store = JobStore()
+
 # Serve /static (logo, avatar, etc.)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+# Tag every request with an id (X-Request-ID) used in the LLM call logs
+app.add_middleware(RequestIdMiddleware)
+
+
 # Serve the main page
 @app.get("/")
 async def read_index():
     return FileResponse("index.html")
 
 
+# Worker threads (micro-batcher) take admission slots through this loop
+@app.on_event("startup")
+async def attach_admission():
+    admission.attach(asyncio.get_running_loop())
+
+
+# Load spaCy and the Ollama model in the background, then keep the model hot
+@app.on_event("startup")
+async def warmup_models():
+    start_warmup(routed_models(), spacy_pipelines=not LITE_ENGINE)
+
+
+# Process queued jobs, resuming those interrupted by the last shutdown.
+# Under serve.py only the first worker process runs the job queue.
+@app.on_event("startup")
+async def start_job_workers():
+    if os.environ.get("EDUSIMPLIFY_RUN_JOBS", "1") != "1":
+        return
+
+    # app.generation never imports spaCy; the full analyzer is only loaded
+    # by the first automatic-level job, and never with the lite engine
+    from app.generation import simplify_with_llm
+    from app.lite import analyze_text_lite
+    from app.rules import resolve_strategy
+
+    def resolve_target(text, target):
+        if LITE_ENGINE:
+            analyze = analyze_text_lite
+        else:
+            from app.cefr import analyze_text as analyze
+        strategy = "target" if target else "auto"
+        return resolve_strategy(text, "standard", strategy, target, analyze)[1]
+
+    # Errors must reach the workers: a failed chunk is retried, then the
+    # job fails instead of finishing with the original text
+    def simplify_chunk(text, target):
+        return simplify_with_llm(text, target, raise_errors=True)
+
+    JobWorkers(job_store, simplify_chunk, resolve_target).start()
+
+
+# Liveness: the process is up
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness: only 200 once the models are loaded
+@app.get("/readyz")
+async def readyz():
+    state = readiness()
+    state["admission"] = admission.status()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
+# LLM token and latency histograms (Prometheus text format)
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(render_metrics())
+
+
+
 class SimplifyRequest(BaseModel):
     text: str
     target_level: str | None = None
 
 
-@app.post("/simplify")
-async def simplify_text(request: SimplifyRequest):
-    target = request.target_level if request.target_level else "A2 (Elementary)"
+class IncompleteOutput(Exception):
+    """The LLM output still misses required fields after every attempt."""
 
-    system_prompt = (
-        "You are a strict French language expert. "
-        "You must Output ONLY valid JSON."
-    )
 
-    user_prompt = f"""
-    Task:
-    1. Analyze the CEFR level of the input text (A1, A2, B1, B2, C1, or C2).
-    2. Simplify the text to the target level: {target}.
-
-    Input Text:
-    "{request.text}"
-
-    Response Format (JSON only):
-    {{
-        "detected_level": "Level detected (e.g. B2)",
-        "target_level": "{target}",
-        "simplified_text": "The simplified French text...",
-        "cefr_explanation": "Brief reason why the original is this level.",
-        "level_explanation": "French explanation of the original CEFR level.",
-        "simplification_strategy": "French explanation of how the text was simplified."
-    }}
+def generate_json(text, target, model, deadline=None, cancel=None):
     """
-
-    try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={
-                "model": "llama3",
-                "prompt": user_prompt,
-                "system": system_prompt,
+    One /simplify generation (SIMPLIFY_JSON), retried when required fields
+    are missing. Runs in a worker thread; raises IncompleteOutput.
+    """
+    # Constant instructions first, then the level and the text: the shared
+    # prefix stays in Ollama's cache and only the tail is evaluated
+    prompt = SIMPLIFY_JSON.generate_fields(target_level=target, text=text)
+    for attempt in range(MAX_GENERATION_ATTEMPTS):
+        # Stop reading as soon as the JSON object is closed
+        parser = IncrementalJSONParser(SIMPLIFY_SCHEMA)
+        result = ollama_post(
+            "/api/generate",
+            {
+                "model": model,
+                **prompt,
                 "stream": False,
-                "format": "json",
+                "format": SIMPLIFY_SCHEMA,
             },
-            timeout=60,
+            deadline=deadline,
+            cancel=cancel,
+            on_chunk=parser.feed,
+            target_level=target,
+            prompt_template=SIMPLIFY_JSON.id,
         )
+        # Tolerant parsing: repairs truncation, ignores extra prose
+        ai_data = parse_tolerant(result.get("response", ""))
+        missing = missing_required(ai_data, SIMPLIFY_SCHEMA)
+        if not missing:
+            return ai_data
+        print(f"Incomplete LLM output (attempt {attempt + 1}), missing: {missing}")
+    raise IncompleteOutput(f"LLM output is missing required fields: {', '.join(missing)}")
+
+
+# Optional micro-batching (EDUSIMPLIFY_LLM_BATCHING=1): short texts of the
+# same level and model share one generation; unusable items are retried
+# one by one with generate_json. The batch and each retry take a full
+# admission slot, so a request is charged for the generations it runs.
+json_batcher = (
+    MicroBatcher(generate_json, JSON_BATCH, admit=admission.thread_slot) if BATCHING_ENABLED else None
+)
+
 
-        result = response.json()
-        ai_data = json.loads(result["response"])
+@app.post("/simplify")
+async def simplify_text(request: SimplifyRequest, http_request: Request):
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    target = request.target_level if request.target_level else "A2 (Elementary)"
+
+    try:
+        check_budget(request.text, target)
+    except PromptTooLong as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        # Cheap signals (level, length, rare words) pick the small or large model
+        model, routing_reason = await run_in_threadpool(choose_model, request.text, target)
+
+        if json_batcher is not None and json_batcher.accepts(request.text):
+            # Slots are taken inside the batcher, per generation
+            ai_data = await run_until_disconnect(
+                http_request, json_batcher.submit, request.text, target, model, deadline=deadline
+            )
+        else:
+            async with admission.slot(deadline):
+                ai_data = await run_until_disconnect(
+                    http_request, generate_json, request.text, target, model, deadline=deadline
+                )
+
+        ai_data = dict(ai_data)
+        ai_data.setdefault("target_level", target)
+        ai_data["model"] = model
+        ai_data["routing_reason"] = routing_reason
         return ai_data
 
+    except Overloaded as e:
+        return JSONResponse(
+            {"detail": e.detail},
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ClientDisconnected:
+        # Nobody is listening anymore; generation was cancelled
+        return Response(status_code=499)
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except IncompleteOutput as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+
+class JobRequest(BaseModel):
+    text: str
+    target_level: str | None = None  # "A1"–"C1" or None (automatic)
+    provisional: bool = True  # return the rules-engine result right away
+
+
+def _rules_preview(text: str, target_level: str | None) -> dict:
+    strategy = "target" if target_level else "auto"
+    if LITE_ENGINE:
+        from app.lite import simplify_text_lite
+
+        result = simplify_text_lite(text, strategy=strategy, target=target_level)
+    else:
+        from app.simplify import simplify_text as simplify_rules
+
+        result = simplify_rules(text, strategy=strategy, target=target_level, engine="rules")
+    return {
+        "simplified": result["simplified"],
+        "target_level": result["target_level"],
+        "engine": "lite" if LITE_ENGINE else "rules",
+    }
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="Empty text.")
+
+    provisional = None
+    if request.provisional:
+        provisional = await run_in_threadpool(_rules_preview, request.text, request.target_level)
+
+    job_id = await run_in_threadpool(
+        job_store.create, request.text, request.target_level, provisional
+    )
+    return {"job_id": job_id, "status": "queued", "provisional": provisional}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return job
+
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await run_in_threadpool(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    if job["status"] == "failed":
+        # The provisional answer stays usable when the LLM could not finish
+        return JSONResponse(
+            {"detail": job["error"], "status": "failed", "provisional": job["provisional"]},
+            status_code=500,
+        )
+    if job["status"] != "done":
+        # Not finished yet: hand back the provisional answer if there is one
+        return JSONResponse(
+            {"status": job["status"], "progress": job["progress"], "provisional": job["provisional"]},
+            status_code=202,
+        )
+    return job["result"]
+
+
+# Server-Sent Events: one "progress" event per change, then "done" or "failed"
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, http_request: Request):
+    if await run_in_threadpool(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+
+    async def stream():
+        last = None
+        while not await http_request.is_disconnected():
+            job = await run_in_threadpool(job_store.get, job_id)
+            state = (job["status"], job["chunks_done"])
+            if state != last:
+                last = state
+                event = job["status"] if job["status"] in {"done", "failed"} else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+                if event != "progress":
+                    return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
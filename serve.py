@@ -0,0 +1,16 @@
+import argparse
+
+from app.prefork import PREFORK_WORKERS, serve
+
+# Pre-fork entry point: models are loaded once in the master process and
+# shared copy-on-write with every worker.
+#   python serve.py --workers 8
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run EduSimplify with pre-forked workers.")
+    parser.add_argument("--app", default="main:app", help="ASGI app, e.g. main:app or api:app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=PREFORK_WORKERS)
+    args = parser.parse_args()
+
+    serve(args.app, host=args.host, port=args.port, workers=args.workers)
@@ -0,0 +1,147 @@
+"""
+Soak test mémoire : envoie au pipeline de règles des textes remplis de mots
+jamais vus (comme des noms propres ou des fautes de frappe) et affiche la
+mémoire résidente et la taille du StringStore spaCy au fil des requêtes.
+
+    EDUSIMPLIFY_NLP_MEMORY_ZONES=1 python soak_memory.py --requests 1000000
+    python soak_memory.py   # comparaison, sans zones (réglage par défaut)
+    python soak_memory.py --recycle --max-rss-mb 400   # réglages par défaut de serve.py
+
+Avec les memory zones, les deux courbes doivent rester plates après la chauffe ;
+sans elles, c'est le recyclage des workers (EDUSIMPLIFY_MAX_RSS_MB) qui borne
+la mémoire. Le mode --recycle le reproduit : le modèle est chargé une fois,
+puis des processus forkés traitent les requêtes et sont remplacés dès que
+leur RSS dépasse la limite, comme sous serve.py.
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+from app.cefr import analyze_text, nlp_cefr
+from app.prefork import MAX_WORKER_RSS_MB
+from app.simplify import simplify_text
+from app.telemetry import process_rss_bytes
+from app.vocab import MEMORY_ZONES_ENABLED, vocab_size
+
+BASE = (
+    "Le comité {w1} a procédé à une analyse approfondie du dossier de {w2}, "
+    "et il convient de noter que les résultats de {w3} restent provisoires."
+)
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 12)))
+
+
+def _request(rng: random.Random) -> None:
+    text = BASE.format(w1=_word(rng), w2=_word(rng).capitalize(), w3=_word(rng))
+    analyze_text(text)
+    simplify_text(text, strategy="target", target="A2", engine="rules")
+
+
+def _report(i: int, start: float, done_before: int = 0) -> int:
+    rss = process_rss_bytes()
+    rate = (i - done_before) / (time.perf_counter() - start)
+    print(
+        f"{i:>9} requests  rss={rss / 2**20:8.1f} MB  "
+        f"strings={vocab_size(nlp_cefr):>9}  {rate:6.0f} req/s",
+        flush=True,
+    )
+    return rss
+
+
+def _soak(args) -> int:
+    rng = random.Random(0)
+    baseline = None
+    start = time.perf_counter()
+
+    for i in range(1, args.requests + 1):
+        _request(rng)
+        if i == args.warmup:
+            baseline = process_rss_bytes()
+        if i % args.report_every == 0:
+            _report(i, start)
+
+    if baseline is None:
+        return 0
+    growth = (process_rss_bytes() - baseline) / 2**20
+    print(f"RSS growth after warm-up: {growth:.1f} MB (limit {args.max_growth_mb} MB)")
+    return 0 if growth <= args.max_growth_mb else 1
+
+
+def _worker(first: int, args, limit: int, out: int) -> None:
+    """Traite les requêtes à partir de `first` jusqu'à dépasser `limit` ; écrit où il s'est arrêté."""
+    rng = random.Random(first)
+    start = time.perf_counter()
+    peak = process_rss_bytes()
+    i = first
+    while i < args.requests:
+        i += 1
+        _request(rng)
+        if i % args.report_every == 0:
+            peak = max(peak, _report(i, start, first))
+            if peak > limit:
+                break
+    os.write(out, f"{i} {peak}".encode())
+
+
+def _soak_recycled(args) -> int:
+    if args.max_rss_mb <= 0:
+        print("recycling disabled (EDUSIMPLIFY_MAX_RSS_MB=0): nothing bounds the vocabulary")
+        return 1
+    limit = args.max_rss_mb * 2**20
+    _request(random.Random(-1))  # chauffe du maître avant le fork, comme prefork.preload
+    done, peak, workers = 0, 0, 0
+    while done < args.requests:
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            try:
+                _worker(done, args, limit, write)
+            finally:
+                os._exit(0)
+        os.close(write)
+        report = os.read(read, 64).decode().split()
+        os.close(read)
+        os.waitpid(pid, 0)
+        workers += 1
+        if not report:
+            print(f"worker {pid} died without reporting")
+            return 1
+        done, worker_peak = int(report[0]), int(report[1])
+        peak = max(peak, worker_peak)
+        if done < args.requests:
+            print(f"worker {pid} recycled at {worker_peak / 2**20:.1f} MB", flush=True)
+
+    # le RSS n'est mesuré que tous les --report-every requêtes : on tolère
+    # --max-growth-mb au-dessus de la limite entre deux mesures
+    print(f"{workers} worker(s), peak RSS {peak / 2**20:.1f} MB (limit {args.max_rss_mb} MB)")
+    return 0 if peak <= limit + args.max_growth_mb * 2**20 else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="EduSimplify memory soak test")
+    parser.add_argument("--requests", type=int, default=1_000_000)
+    parser.add_argument("--report-every", type=int, default=10_000)
+    parser.add_argument("--warmup", type=int, default=2_000, help="requests ignored before taking the baseline")
+    parser.add_argument("--max-growth-mb", type=float, default=50.0, help="allowed RSS growth after warm-up")
+    parser.add_argument(
+        "--recycle",
+        action="store_true",
+        help="run in forked workers restarted above --max-rss-mb, like serve.py",
+    )
+    parser.add_argument("--max-rss-mb", type=int, default=MAX_WORKER_RSS_MB, help="worker RSS limit with --recycle")
+    args = parser.parse_args()
+
+    print(f"memory zones: {'on' if MEMORY_ZONES_ENABLED else 'off'}")
+    if args.recycle:
+        return _soak_recycled(args)
+    return _soak(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
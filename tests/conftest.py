@@ -0,0 +1,90 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class StandInOllama:
+    """
+    Serveur HTTP local qui imite Ollama : GET /api/version pour la santé,
+    POST /api/generate et /api/chat pour les générations. Les réponses
+    (code HTTP, lignes NDJSON en streaming, blocage) se règlent par test.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 200  # code des réponses POST
+        self.health_status = 200  # code de GET /api/version
+        self.chunks = ["ok"]  # morceaux envoyés en streaming
+        self.hold = threading.Event()  # si `hold_requests`, bloque jusqu'au set()
+        self.hold_requests = False
+        self.posts = []  # corps JSON reçus
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._send(server.health_status, {"version": "0.0.0"})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.posts.append(body)
+                if server.hold_requests:
+                    server.hold.wait(5)
+                if server.status != 200:
+                    self._send(server.status, {"error": f"{server.name} failed"})
+                    return
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    for chunk in server.chunks:
+                        self.wfile.write((json.dumps({"response": chunk, "done": False}) + "\n").encode())
+                    final = {"response": "", "done": True, "eval_count": len(server.chunks)}
+                    self.wfile.write((json.dumps(final) + "\n").encode())
+                    return
+                self._send(200, {"response": server.name, "done": True})
+
+            def _send(self, status, obj):
+                data = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    @property
+    def hits(self) -> int:
+        with self.lock:
+            return len(self.posts)
+
+    def close(self) -> None:
+        self.hold.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def ollama_servers():
+    """Fabrique de serveurs Ollama de substitution, arrêtés en fin de test."""
+    servers = []
+
+    def make(name: str) -> StandInOllama:
+        server = StandInOllama(name)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.close()
@@ -0,0 +1,226 @@
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+from app.admission import AdmissionController, ClientDisconnected, Overloaded, run_until_disconnect
+from app.backends import RequestCancelled
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def _deadline(seconds: float = 5.0) -> float:
+    return time.monotonic() + seconds
+
+
+def test_slots_are_granted_in_arrival_order():
+    async def scenario():
+        admission = AdmissionController(1, max_queue=4)
+        order = []
+
+        async def request(name, hold):
+            async with admission.slot(_deadline()):
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(request("a", 0.05), request("b", 0), request("c", 0))
+        return order, admission.status()
+
+    order, status = _run(scenario())
+    assert order == ["a", "b", "c"]
+    assert status["inflight"] == 0
+    assert status["queued"] == 0
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        admission = AdmissionController(1, max_queue=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with admission.slot(_deadline()):
+                await release.wait()
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as excinfo:
+            async with admission.slot(_deadline()):
+                pass
+        release.set()
+        await asyncio.gather(first, queued)
+        return excinfo.value
+
+    error = _run(scenario())
+    assert error.status_code == 429
+    assert error.retry_after > 0
+
+
+def test_deadline_expires_in_queue_with_503():
+    async def scenario():
+        admission = AdmissionController(1)
+        async with admission.slot(_deadline()):
+            with pytest.raises(Overloaded) as excinfo:
+                async with admission.slot(_deadline(0.05)):
+                    pass
+        return excinfo.value, admission.status()
+
+    error, status = _run(scenario())
+    assert error.status_code == 503
+    assert status == dict(status, inflight=0, queued=0)
+
+
+def test_no_capacity_is_rejected_with_503():
+    async def scenario():
+        admission = AdmissionController(lambda: 0)
+        with pytest.raises(Overloaded) as excinfo:
+            async with admission.slot(_deadline()):
+                pass
+        return excinfo.value
+
+    assert _run(scenario()).status_code == 503
+
+
+def test_capacity_follows_callable():
+    capacity = [1]
+
+    async def scenario():
+        admission = AdmissionController(lambda: capacity[0])
+        async with admission.slot(_deadline()):
+            capacity[0] = 2
+            # un backend de plus : la seconde requête passe sans attendre
+            async with admission.slot(_deadline(0.01)):
+                return admission.status()
+
+    assert _run(scenario())["inflight"] == 2
+
+
+def test_thread_slot_waits_in_the_event_loop():
+    async def scenario():
+        admission = AdmissionController(1)
+        admission.attach(asyncio.get_running_loop())
+        inside = []
+
+        def generation(name):
+            with admission.thread_slot(_deadline()):
+                inside.append(admission.status()["inflight"])
+                time.sleep(0.05)
+
+        await asyncio.gather(*(asyncio.to_thread(generation, n) for n in "abc"))
+        return inside, admission.status()
+
+    inside, status = _run(scenario())
+    # une génération à la fois, et tous les créneaux sont rendus
+    assert inside == [1, 1, 1]
+    assert status["inflight"] == 0
+
+
+def test_thread_slot_gives_up_its_place_when_cancelled(monkeypatch):
+    monkeypatch.setattr("app.admission.DISCONNECT_POLL_INTERVAL", 0.01)
+
+    async def scenario():
+        admission = AdmissionController(1)
+        admission.attach(asyncio.get_running_loop())
+        cancel = threading.Event()
+
+        def queued():
+            with admission.thread_slot(_deadline(), cancel=cancel):
+                pass
+
+        async with admission.slot(_deadline()):
+            waiting = asyncio.ensure_future(asyncio.to_thread(queued))
+            await asyncio.sleep(0.05)
+            queued_status = admission.status()
+            cancel.set()
+            with pytest.raises(RequestCancelled):
+                await waiting
+        return queued_status, admission.status()
+
+    queued_status, status = _run(scenario())
+    assert queued_status["queued"] == 1
+    assert status["inflight"] == 0
+    assert status["queued"] == 0
+
+
+def test_cancelled_waiter_lets_the_next_one_through():
+    async def scenario():
+        admission = AdmissionController(1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with admission.slot(_deadline()):
+                await release.wait()
+
+        async def small():
+            async with admission.slot(_deadline()):
+                return "small"
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        big = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        nxt = asyncio.create_task(small())
+        await asyncio.sleep(0)
+        big.cancel()
+        release.set()
+        result = await nxt
+        await first
+        with pytest.raises(asyncio.CancelledError):
+            await big
+        return result, admission.status()
+
+    result, status = _run(scenario())
+    assert result == "small"
+    assert status["inflight"] == 0
+    assert status["queued"] == 0
+
+
+class _Request:
+    def __init__(self, disconnect_after: float):
+        self._at = time.monotonic() + disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        return time.monotonic() >= self._at
+
+
+def test_run_until_disconnect_returns_result():
+    def work(x, cancel):
+        return x * 2
+
+    assert _run(run_until_disconnect(_Request(60), work, 21)) == 42
+
+
+def test_disconnect_holds_slot_until_worker_stops(monkeypatch):
+    monkeypatch.setattr("app.admission.DISCONNECT_POLL_INTERVAL", 0.01)
+    stopped = threading.Event()
+
+    def work(cancel):
+        cancel.wait(5)
+        time.sleep(0.1)  # le backend met un peu de temps à s'arrêter
+        stopped.set()
+        raise RuntimeError("cancelled")
+
+    loop_errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop_errors.append(context))
+        admission = AdmissionController(1)
+        with pytest.raises(ClientDisconnected):
+            async with admission.slot(_deadline()):
+                await run_until_disconnect(_Request(0.05), work)
+        # le créneau n'est rendu qu'une fois le thread terminé
+        stopped_before_release = stopped.is_set()
+        await asyncio.sleep(0.2)
+        gc.collect()
+        return stopped_before_release, admission.status()
+
+    stopped_before_release, status = _run(scenario())
+    assert stopped_before_release
+    assert status["inflight"] == 0
+    # l'exception du thread a été lue : pas de "Task exception was never retrieved"
+    assert loop_errors == []
@@ -0,0 +1,294 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from app.backends import BackendPool, DeadlineExceeded, NoBackendAvailable, RequestCancelled
+
+
+def _pool(*servers, **kwargs):
+    return BackendPool([s.url for s in servers], **kwargs)
+
+
+def _generate(pool, **kwargs):
+    return pool.post("/api/generate", {"model": "m", "prompt": "p"}, timeout=5, **kwargs)
+
+
+# -------------------------------------------------
+# ROUTAGE
+# -------------------------------------------------
+
+def test_routes_to_least_outstanding_backend(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    pool = _pool(a, b)
+
+    busy = pool.acquire()
+    assert busy.url == a.url
+    assert _generate(pool)["response"] == "b"
+    assert _generate(pool)["response"] == "b"
+    pool.release(busy, ok=True)
+
+    assert (a.hits, b.hits) == (0, 2)
+    assert [s["outstanding"] for s in pool.status()] == [0, 0]
+
+
+def test_concurrent_requests_spread_over_backends(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.hold_requests = b.hold_requests = True
+    pool = _pool(a, b)
+
+    threads = [threading.Thread(target=_generate, args=(pool,)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + 5
+    while a.hits + b.hits < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert (a.hits, b.hits) == (2, 2)
+
+    a.hold.set()
+    b.hold.set()
+    for t in threads:
+        t.join()
+
+
+def test_full_backends_only_used_when_all_are_full(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    pool = _pool(a, b, max_inflight=1)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+    assert {first.url, second.url} == {a.url, b.url}
+    assert third.outstanding == 2
+    for backend in (first, second, third):
+        pool.release(backend, ok=True)
+
+
+# -------------------------------------------------
+# BASCULEMENT
+# -------------------------------------------------
+
+def test_5xx_fails_over_to_next_backend(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = 500
+    pool = _pool(a, b)
+
+    assert _generate(pool)["response"] == "b"
+    assert (a.hits, b.hits) == (1, 1)
+    assert pool.status()[0]["failures"] == 1
+    assert pool.status()[1]["failures"] == 0
+
+
+def test_unreachable_backend_fails_over(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.close()
+    pool = _pool(a, b)
+
+    assert _generate(pool)["response"] == "b"
+    assert pool.status()[0]["failures"] == 1
+
+
+def test_4xx_is_not_retried(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = 400
+    pool = _pool(a, b)
+
+    with pytest.raises(requests.HTTPError):
+        _generate(pool)
+    assert (a.hits, b.hits) == (1, 0)
+    assert pool.status()[0]["failures"] == 0
+
+
+def test_last_error_raised_when_every_backend_fails(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = b.status = 503
+    pool = _pool(a, b)
+
+    with pytest.raises(requests.HTTPError):
+        _generate(pool)
+    assert (a.hits, b.hits) == (1, 1)
+
+
+# -------------------------------------------------
+# DISJONCTEUR
+# -------------------------------------------------
+
+def test_circuit_opens_after_threshold_then_closes_on_success(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = 500
+    pool = _pool(a, b, failure_threshold=2, cooldown=0.3)
+
+    for _ in range(4):
+        assert _generate(pool)["response"] == "b"
+    # deux échecs ouvrent le disjoncteur : a n'est plus essayé
+    assert a.hits == 2
+    assert pool.status()[0]["circuit_open"]
+    assert pool.capacity() == pool.max_inflight
+
+    # après le délai, a reçoit une requête d'essai ; un succès referme le disjoncteur
+    time.sleep(0.35)
+    a.status = 200
+    assert _generate(pool)["response"] == "a"
+    state = pool.status()[0]
+    assert not state["circuit_open"]
+    assert state["failures"] == 0
+    assert pool.capacity() == 2 * pool.max_inflight
+
+
+def test_every_circuit_open_means_no_backend(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = b.status = 500
+    pool = _pool(a, b, failure_threshold=1, cooldown=30)
+
+    with pytest.raises(requests.HTTPError):
+        _generate(pool)
+    assert all(s["circuit_open"] for s in pool.status())
+
+    # aucun trafic vers des backends connus en panne
+    with pytest.raises(NoBackendAvailable):
+        _generate(pool)
+    assert (a.hits, b.hits) == (1, 1)
+    assert pool.capacity() == 0
+
+
+def test_half_open_lets_a_single_probe_through(ollama_servers):
+    a = ollama_servers("a")
+    a.status = 500
+    pool = _pool(a, failure_threshold=1, cooldown=0.1)
+
+    with pytest.raises(requests.HTTPError):
+        _generate(pool)
+    time.sleep(0.15)
+    assert pool.capacity() == 1
+
+    probe = pool.acquire()
+    assert pool.status()[0]["probing"]
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+    assert pool.capacity() == 0
+
+    # l'essai échoue : le disjoncteur se rouvre pour un nouveau délai
+    pool.release(probe, ok=False)
+    assert pool.status()[0]["circuit_open"]
+    with pytest.raises(NoBackendAvailable):
+        pool.acquire()
+
+
+def test_cancelled_request_keeps_circuit_state(ollama_servers):
+    a = ollama_servers("a")
+    a.status = 500
+    pool = _pool(a, failure_threshold=1, cooldown=0.1)
+
+    with pytest.raises(requests.HTTPError):
+        _generate(pool)
+    time.sleep(0.15)
+
+    # le client de la requête d'essai se déconnecte : le backend reste suspect
+    a.status = 200
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestCancelled):
+        _generate(pool, cancel=cancel)
+    state = pool.status()[0]
+    assert state["failures"] == 1
+    assert not state["probing"]
+    assert pool.capacity() == 1
+
+
+def test_slow_requests_past_deadline_never_open_the_circuit(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.hold_requests = b.hold_requests = True
+    pool = _pool(a, b, failure_threshold=2)
+
+    for _ in range(4):
+        with pytest.raises(DeadlineExceeded):
+            _generate(pool, deadline=time.monotonic() + 0.2)
+    # pas de nouvelle tentative sur un autre backend, aucun échec compté
+    assert a.hits + b.hits == 4
+    assert [s["failures"] for s in pool.status()] == [0, 0]
+    assert not any(s["circuit_open"] for s in pool.status())
+    assert pool.capacity() == 2 * pool.max_inflight
+
+
+def test_timeout_without_deadline_is_a_backend_failure(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.hold_requests = True
+    pool = _pool(a, b)
+
+    result = pool.post("/api/generate", {"model": "m", "prompt": "p"}, timeout=0.2)
+    assert result["response"] == "b"
+    assert pool.status()[0]["failures"] == 1
+
+
+# -------------------------------------------------
+# SANTÉ
+# -------------------------------------------------
+
+def test_health_check_marks_backend_down_and_up(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.health_status = 503
+    pool = _pool(a, b)
+
+    pool.check_health()
+    assert [s["healthy"] for s in pool.status()] == [False, True]
+    assert pool.capacity() == pool.max_inflight
+    for _ in range(3):
+        assert _generate(pool)["response"] == "b"
+    assert a.hits == 0
+
+    a.health_status = 200
+    pool.check_health()
+    assert [s["healthy"] for s in pool.status()] == [True, True]
+    assert pool.capacity() == 2 * pool.max_inflight
+
+
+def test_health_check_closes_open_circuit(ollama_servers):
+    a, b = ollama_servers("a"), ollama_servers("b")
+    a.status = 500
+    pool = _pool(a, b, failure_threshold=1, cooldown=30)
+
+    _generate(pool)
+    assert pool.status()[0]["circuit_open"]
+
+    pool.check_health()
+    assert not pool.status()[0]["circuit_open"]
+    assert pool.status()[0]["failures"] == 0
+
+
+def test_unreachable_backend_fails_health_check(ollama_servers):
+    a = ollama_servers("a")
+    a.close()
+    pool = _pool(a)
+
+    pool.check_health()
+    assert not pool.status()[0]["healthy"]
+    assert pool.capacity() == 0
+
+
+# -------------------------------------------------
+# STREAMING
+# -------------------------------------------------
+
+def test_early_stop_keeps_final_stats(ollama_servers):
+    a = ollama_servers("a")
+    a.chunks = ['{"a": 1}', " extra", " prose"]
+    pool = _pool(a)
+
+    result = _generate(pool, on_chunk=lambda chunk: chunk.endswith("}"))
+    assert result["response"] == '{"a": 1}'
+    assert result["done"] is True
+    assert result["eval_count"] == 3
+
+
+def test_cancel_stops_reading(ollama_servers):
+    a = ollama_servers("a")
+    pool = _pool(a)
+    cancel = threading.Event()
+    cancel.set()
+
+    with pytest.raises(RequestCancelled):
+        _generate(pool, cancel=cancel)
+    # une annulation n'est pas un échec du backend
+    assert pool.status()[0]["failures"] == 0
+    assert pool.status()[0]["outstanding"] == 0
@@ -0,0 +1,197 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+from app.backends import DeadlineExceeded, RequestCancelled
+from app.batching import MicroBatcher, parse_batch_response
+from app.telemetry import batch_request_ids_var, request_id_var
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Remplace la génération groupée : renvoie "S:<texte>" sauf pour "perdu"."""
+    calls = []
+
+    def generate_batch(texts, level, model, fmt, deadline=None, cancel=None):
+        calls.append(list(texts))
+        return {i: f"S:{t}" for i, t in enumerate(texts) if t != "perdu"}
+
+    monkeypatch.setattr("app.batching.generate_batch", generate_batch)
+    return calls
+
+
+def _submit_all(batcher, texts, level="A2", model="m"):
+    with ThreadPoolExecutor(len(texts)) as pool:
+        return list(pool.map(lambda t: batcher.submit(t, level, model), texts))
+
+
+def test_concurrent_short_texts_share_one_generation(batches):
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: f"F:{t}", window=0.05, max_size=8)
+    results = _submit_all(batcher, ["un", "deux", "trois"])
+
+    assert results == ["S:un", "S:deux", "S:trois"]
+    assert len(batches) == 1
+    assert sorted(batches[0]) == ["deux", "trois", "un"]
+
+
+def test_groups_are_split_by_level_and_model(batches):
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: f"F:{t}", window=0.05)
+    requests = [("a", "A2", "m"), ("b", "B1", "m"), ("c", "A2", "grand")] * 2
+    with ThreadPoolExecutor(len(requests)) as pool:
+        futures = [pool.submit(batcher.submit, *r) for r in requests]
+        assert [f.result() for f in futures] == ["S:a", "S:b", "S:c"] * 2
+    assert sorted(batches) == [["a", "a"], ["b", "b"], ["c", "c"]]
+
+
+def test_lone_text_goes_straight_to_fallback(batches):
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: f"F:{t}", window=0.01)
+    assert batcher.submit("seul", "A2", "m") == "F:seul"
+    assert batches == []
+
+
+def test_each_generation_takes_an_admission_slot(batches):
+    admitted, lock = [], threading.Lock()
+    inflight = [0]
+
+    @contextmanager
+    def admit(deadline, cancel):
+        with lock:
+            inflight[0] += 1
+            admitted.append(inflight[0])
+        try:
+            yield
+        finally:
+            with lock:
+                inflight[0] -= 1
+
+    def fallback(text, level, model, **kwargs):
+        time.sleep(0.02)
+        return f"F:{text}"
+
+    batcher = MicroBatcher(fallback, window=0.05, max_words=3, admit=admit)
+    texts = ["un", "deux", "perdu", "un texte bien trop long"]
+    assert _submit_all(batcher, texts) == ["S:un", "S:deux", "F:perdu", "F:un texte bien trop long"]
+    # le lot, la reprise de "perdu" et le texte long : trois générations
+    assert len(admitted) == 3
+
+
+def test_missing_item_falls_back_on_caller_thread(batches):
+    threads = []
+
+    def fallback(text, level, model, **kwargs):
+        threads.append(threading.current_thread().name)
+        return f"F:{text}"
+
+    batcher = MicroBatcher(fallback, window=0.05)
+    assert _submit_all(batcher, ["un", "perdu"]) == ["S:un", "F:perdu"]
+    # thread de la requête, pas celui du minuteur qui a vidé le lot
+    assert len(threads) == 1 and threads[0].startswith("ThreadPoolExecutor")
+
+
+def test_fallback_errors_reach_the_caller(batches):
+    def fallback(text, level, model, **kwargs):
+        raise RuntimeError("backend down")
+
+    batcher = MicroBatcher(fallback, window=0.01)
+    with pytest.raises(RuntimeError, match="backend down"):
+        batcher.submit("perdu", "A2", "m")
+
+
+def test_long_text_skips_batching(batches):
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: "F", max_words=3)
+    assert batcher.submit("un texte bien trop long", "A2", "m") == "F"
+    assert batches == []
+
+
+def test_full_batch_does_not_shorten_next_window(batches):
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: "F", window=0.2, max_size=2)
+    assert _submit_all(batcher, ["a", "b"]) == ["S:a", "S:b"]
+
+    # le minuteur du premier lot est annulé : le suivant attend sa propre fenêtre
+    start = time.monotonic()
+    assert batcher.submit("c", "A2", "m") == "F"
+    assert time.monotonic() - start >= 0.15
+    assert [sorted(b) for b in batches] == [["a", "b"]]
+
+
+def test_waiting_caller_gives_up_at_its_deadline(monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def generate_batch(texts, level, model, fmt, deadline=None, cancel=None):
+        calls.append((deadline, cancel))
+        started.set()
+        release.wait(5)
+        return {}
+
+    monkeypatch.setattr("app.batching.generate_batch", generate_batch)
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: "F", window=0.01)
+    deadline = time.monotonic() + 0.2
+    try:
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(batcher.submit, t, "A2", "m", deadline=deadline) for t in "ab"]
+            for future in futures:
+                with pytest.raises(DeadlineExceeded):
+                    future.result(2)
+        assert time.monotonic() - deadline < 0.15
+    finally:
+        release.set()
+
+    # la génération groupée reçoit le délai, et son annulation une fois abandonnée
+    [(batch_deadline, batch_cancel)] = calls
+    assert batch_deadline == deadline
+    assert batch_cancel.is_set()
+
+
+def test_cancel_only_stops_the_batch_when_every_caller_left(monkeypatch):
+    release, cancels = threading.Event(), []
+
+    def generate_batch(texts, level, model, fmt, deadline=None, cancel=None):
+        cancels.append(cancel)
+        release.wait(5)
+        return {i: f"S:{t}" for i, t in enumerate(texts)}
+
+    monkeypatch.setattr("app.batching.generate_batch", generate_batch)
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: "F", window=0.01)
+    gone = threading.Event()
+    with ThreadPoolExecutor(2) as pool:
+        left = pool.submit(batcher.submit, "a", "A2", "m", cancel=gone)
+        stays = pool.submit(batcher.submit, "b", "A2", "m")
+        while not cancels:
+            time.sleep(0.01)
+        gone.set()
+        with pytest.raises(RequestCancelled):
+            left.result(2)
+        # l'autre appelant attend toujours : le lot continue
+        assert not cancels[0].is_set()
+        release.set()
+        assert stays.result(2) == "S:b"
+
+
+def test_batch_generation_knows_its_request_ids(monkeypatch):
+    seen = []
+
+    def generate_batch(texts, level, model, fmt, deadline=None, cancel=None):
+        seen.append((threading.current_thread().name, batch_request_ids_var.get()))
+        return {i: f"S:{t}" for i, t in enumerate(texts)}
+
+    def submit(text):
+        request_id_var.set(f"req-{text}")
+        return batcher.submit(text, "A2", "m")
+
+    monkeypatch.setattr("app.batching.generate_batch", generate_batch)
+    batcher = MicroBatcher(lambda t, lvl, m, **kw: "F", window=0.05)
+    with ThreadPoolExecutor(2) as pool:
+        assert list(pool.map(submit, ["a", "b"])) == ["S:a", "S:b"]
+
+    # vidé par le minuteur, qui n'hérite pas du contexte des requêtes
+    [(thread, ids)] = seen
+    assert not thread.startswith("ThreadPoolExecutor")
+    assert sorted(ids) == ["req-a", "req-b"]
+
+
+def test_parse_batch_response_keeps_valid_items_only():
+    raw = '{"items": [{"index": 1, "simplified": "deux"}, {"index": 5, "simplified": "x"}, {"index": 0}]}'
+    assert parse_batch_response(raw, 3) == {1: "deux"}
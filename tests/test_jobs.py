@@ -0,0 +1,154 @@
+import threading
+import time
+
+from app.jobs import JobStore, JobWorkers, split_into_chunks
+
+
+def test_paragraphs_are_grouped_up_to_the_word_budget():
+    text = "Un deux trois.\n\nQuatre cinq.\n\nSix sept huit neuf."
+    assert split_into_chunks(text, max_words=5) == ["Un deux trois.\n\nQuatre cinq.", "Six sept huit neuf."]
+
+
+def test_long_paragraph_is_cut_at_sentence_ends():
+    # un chapitre sans ligne vide, une phrase par ligne
+    text = "\n".join(f"Phrase numéro {i} du chapitre." for i in range(30))
+    chunks = split_into_chunks(text, max_words=20)
+
+    # cinq mots par phrase : quatre phrases par morceau
+    assert len(chunks) == 8
+    assert all(len(c.split()) <= 20 for c in chunks)
+    assert chunks[-1] == "Phrase numéro 28 du chapitre. Phrase numéro 29 du chapitre."
+
+
+def test_sentence_longer_than_budget_stays_whole():
+    long_sentence = "Un " + " ".join(["mot"] * 11) + "."
+    assert split_into_chunks(f"Court. {long_sentence} Fin.", max_words=5) == ["Court.", long_sentence, "Fin."]
+
+
+def test_only_jobs_whose_lease_expired_are_requeued(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    ids = [store.create(f"Texte {i}.", "A2") for i in range(2)]
+    assert store.claim_next()["id"] == ids[0]
+    assert store.claim_next()["id"] == ids[1]
+
+    time.sleep(0.1)
+    store.heartbeat([ids[1]])
+    # ids[0] n'a plus de signe de vie ; ids[1] est encore suivi par son worker
+    assert store.requeue_stale(lease=0.05) == 1
+    assert store.get(ids[0])["status"] == "queued"
+    assert store.get(ids[1])["status"] == "running"
+
+
+def test_workers_do_not_take_over_a_job_running_elsewhere(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create("Texte long.", "A2")
+    store.claim_next()  # traité par un autre processus, bien vivant
+    release = threading.Event()
+
+    def simplify_chunk(text, target):
+        release.wait(5)
+        return "Simple."
+
+    workers = JobWorkers(store, simplify_chunk, lambda text, target: target, workers=1, lease=0.3)
+    workers.start()
+    for _ in range(6):
+        store.heartbeat([job_id])
+        time.sleep(0.05)
+    assert store.get(job_id)["status"] == "running"
+
+    # l'autre processus s'arrête : le bail expire et le travail reprend ici
+    release.set()
+    for _ in range(100):
+        if store.get(job_id)["status"] == "done":
+            break
+        time.sleep(0.05)
+    assert store.get(job_id)["result"]["simplified"] == "Simple."
+
+
+def _wait_for(store, job_id, status, timeout=5.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        job = store.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {store.get(job_id)['status']}")
+
+
+def test_each_job_is_claimed_once_across_stores(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    first, second = JobStore(path), JobStore(path)
+    ids = [first.create(f"Texte {i}.", "A2") for i in range(20)]
+
+    claimed = []
+    lock = threading.Lock()
+
+    def drain(store):
+        while True:
+            row = store.claim_next()
+            if row is None:
+                return
+            with lock:
+                claimed.append(row["id"])
+
+    threads = [threading.Thread(target=drain, args=(s,)) for s in (first, second, first, second)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_failed_chunk_is_retried(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = store.create("Premier paragraphe.\n\nSecond paragraphe.", "A2")
+    calls = []
+
+    def simplify_chunk(text, target):
+        calls.append(text)
+        if len(calls) == 1:
+            raise RuntimeError("backend down")
+        return text.upper()
+
+    JobWorkers(store, simplify_chunk, lambda text, target: target, workers=1, retry_delay=0).start()
+    job = _wait_for(store, job_id, "done")
+    assert job["result"]["simplified"] == "PREMIER PARAGRAPHE.\n\nSECOND PARAGRAPHE."
+    assert calls[0] == calls[1]
+
+
+def test_job_fails_after_every_attempt_and_keeps_its_progress(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    text = " ".join(["mot"] * 150) + ".\n\n" + " ".join(["Autre"] * 150) + "."
+    job_id = store.create(text, "A2", provisional={"simplified": "brouillon"})
+
+    def simplify_chunk(chunk, target):
+        if chunk.startswith("Autre"):
+            raise RuntimeError("backend down")
+        return "fait"
+
+    JobWorkers(store, simplify_chunk, lambda text, target: target, workers=1, attempts=2, retry_delay=0).start()
+    job = _wait_for(store, job_id, "failed")
+    assert job["error"] == "backend down"
+    assert (job["chunks_done"], job["chunks_total"]) == (1, 2)
+    assert job["provisional"] == {"simplified": "brouillon"}
+
+
+def test_requeued_job_resumes_after_the_last_chunk(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    text = " ".join(["Un"] * 150) + ".\n\n" + " ".join(["Deux"] * 150) + "."
+    job_id = store.create(text, "A2")
+    store.claim_next()
+    store.save_chunk(job_id, ["premier fait"])  # puis le processus s'arrête
+    time.sleep(0.06)
+    assert store.requeue_stale(lease=0.05) == 1
+
+    calls = []
+
+    def simplify_chunk(chunk, target):
+        calls.append(chunk)
+        return "second fait"
+
+    JobWorkers(store, simplify_chunk, lambda text, target: target, workers=1).start()
+    job = _wait_for(store, job_id, "done")
+    assert job["result"]["simplified"] == "premier fait\n\nsecond fait"
+    assert [c.split()[0] for c in calls] == ["Deux"]
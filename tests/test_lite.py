@@ -0,0 +1,22 @@
+import pytest
+
+from app.lite import split_sentences
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Il pleut. Nous restons.", ["Il pleut.", "Nous restons."]),
+        ("M. Dupont est là. Mme Martin aussi.", ["M. Dupont est là.", "Mme Martin aussi."]),
+        ("J. Dupont arrive. Voir p. 12 pour la suite.", ["J. Dupont arrive.", "Voir p. 12 pour la suite."]),
+        ("Rendez-vous à 10 h. Il a dit oui.", ["Rendez-vous à 10 h.", "Il a dit oui."]),
+        ("« Bonjour ! » Puis il part.", ["« Bonjour ! »", "Puis il part."]),
+        ("« Bonjour ! » Puis il part.", ["« Bonjour ! »", "Puis il part."]),
+        ("Il dit : « Viens. » Elle vient.", ["Il dit : « Viens. »", "Elle vient."]),
+        ("Quoi ?! — Rien.", ["Quoi ?!", "— Rien."]),
+        ("Il pleut. et il vente.", ["Il pleut. et il vente."]),
+        ("Un.\n\ndeux", ["Un.", "deux"]),
+    ],
+)
+def test_split_sentences(text, expected):
+    assert split_sentences(text) == expected
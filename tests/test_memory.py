@@ -0,0 +1,145 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+from app.memory import SimplificationMemory, adapt, minhash, normalize, _similarity
+
+SOURCE = "Le comité de Lyon a procédé à une analyse approfondie du dossier en 2021."
+OUTPUT = "Le comité de Lyon a bien étudié le dossier en 2021."
+
+
+def _memory(tmp_path=None, **kwargs):
+    path = str(tmp_path / "memory.json") if tmp_path is not None else None
+    return SimplificationMemory(path=path, **kwargs)
+
+
+def test_minhash_estimates_similarity():
+    near = "Le comité de Lyon a procédé à une analyse approfondie du dossier en 2022."
+    far = "Il fait beau aujourd'hui sur toute la côte atlantique."
+    sig = minhash(normalize(SOURCE))
+    assert _similarity(sig, minhash(normalize(SOURCE))) == 1.0
+    assert _similarity(sig, minhash(normalize(near))) > 0.7
+    assert _similarity(sig, minhash(normalize(far))) < 0.3
+
+
+def test_exact_match_ignores_case_and_spacing():
+    memory = _memory()
+    memory.add(SOURCE, OUTPUT, "A2")
+    assert memory.lookup("  " + SOURCE.upper() + " ", "A2") == OUTPUT
+    assert memory.lookup(SOURCE, "B1") is None
+
+
+def test_near_duplicate_is_adapted():
+    memory = _memory()
+    memory.add(SOURCE, OUTPUT, "A2")
+    assert memory.lookup(SOURCE.replace("2021", "2023"), "A2") == OUTPUT.replace("2021", "2023")
+
+
+def test_similarity_threshold():
+    variant = SOURCE.replace("Lyon", "Marseille").replace("2021", "2023")
+    strict, loose = _memory(), _memory(threshold=0.5)
+    for memory in (strict, loose):
+        memory.add(SOURCE, OUTPUT, "A2")
+    assert strict.lookup(variant, "A2") is None
+    assert loose.lookup(variant, "A2") == OUTPUT.replace("Lyon", "Marseille").replace("2021", "2023")
+
+
+def test_change_that_cannot_be_carried_over_is_a_miss():
+    memory = _memory()
+    memory.add(SOURCE, OUTPUT, "A2")
+    # "approfondie" a été reformulé dans la sortie : impossible à reporter
+    variant = SOURCE.replace("approfondie", "rigoureuse")
+    assert memory.lookup(variant, "A2") is None
+    assert memory.stats()["misses"] == 1
+
+
+def test_adapt_rejects_insertions_and_function_words():
+    assert adapt("Le chat dort bien.", "Le chat dort.", "Le chat dort.") is None
+    assert adapt("La chatte dort.", "Le chatte dort.", "Le chatte dort.") is None
+    assert adapt("Paul dort.", "Marie dort.", "Marie dort.") == "Paul dort."
+
+
+def test_least_recently_used_entries_are_evicted():
+    memory = _memory(max_entries=2)
+    memory.add("Première phrase assez longue pour le test.", "un", "A2")
+    memory.add("Deuxième phrase assez longue pour le test.", "deux", "A2")
+    memory.lookup("Première phrase assez longue pour le test.", "A2")
+    memory.add("Troisième phrase assez longue pour le test.", "trois", "A2")
+
+    assert memory.stats()["entries"] == 2
+    assert memory.lookup("Deuxième phrase assez longue pour le test.", "A2") is None
+    assert memory.lookup("Première phrase assez longue pour le test.", "A2") == "un"
+
+
+def test_save_and_reload(tmp_path):
+    memory = _memory(tmp_path)
+    memory.add(SOURCE, OUTPUT, "A2")
+    memory.save()
+
+    assert _memory(tmp_path).lookup(SOURCE, "A2") == OUTPUT
+    # pas de fichier temporaire laissé derrière
+    assert sorted(os.listdir(tmp_path)) == ["memory.json", "memory.json.lock"]
+
+
+def test_save_merges_pairs_written_by_other_workers(tmp_path):
+    first, second = _memory(tmp_path), _memory(tmp_path)
+    first.add(SOURCE, OUTPUT, "A2")
+    first.save()
+    second.add("Il pleut sur la ville depuis ce matin.", "Il pleut.", "A1")
+    second.save()
+
+    saved = json.loads((tmp_path / "memory.json").read_text(encoding="utf-8"))
+    assert [e["source"] for e in saved] == [SOURCE, "Il pleut sur la ville depuis ce matin."]
+
+
+def test_unreadable_file_is_overwritten_on_save(tmp_path, capsys):
+    memory = _memory(tmp_path)
+    (tmp_path / "memory.json").write_text("{pas du json", encoding="utf-8")
+    memory.add(SOURCE, OUTPUT, "A2")
+    memory.save()
+
+    assert "[MEMORY ERROR]" in capsys.readouterr().out
+    assert _memory(tmp_path).lookup(SOURCE, "A2") == OUTPUT
+
+
+def test_unreadable_file_is_ignored_at_startup(tmp_path, capsys):
+    (tmp_path / "memory.json").write_text("{pas du json", encoding="utf-8")
+    memory = _memory(tmp_path)
+
+    assert memory.stats()["entries"] == 0
+    assert "[MEMORY ERROR]" in capsys.readouterr().out
+
+
+def test_save_waits_for_the_file_lock(tmp_path):
+    memory = _memory(tmp_path)
+    memory.add(SOURCE, OUTPUT, "A2")
+    with open(tmp_path / "memory.json.lock", "a") as lock:
+        # un autre worker est en train de fusionner
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        saver = threading.Thread(target=memory.save)
+        saver.start()
+        time.sleep(0.1)
+        assert not (tmp_path / "memory.json").exists()
+        fcntl.flock(lock, fcntl.LOCK_UN)
+    saver.join(2)
+    assert _memory(tmp_path).lookup(SOURCE, "A2") == OUTPUT
+
+
+def test_periodic_save_runs_off_the_request_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.memory.MEMORY_SAVE_EVERY", 2)
+    memory = _memory(tmp_path)
+    threads = []
+    save = memory.save
+    monkeypatch.setattr(memory, "save", lambda: (threads.append(threading.current_thread()), save()))
+
+    memory.add(SOURCE, OUTPUT, "A2")
+    memory.add("Il pleut sur la ville depuis ce matin.", "Il pleut.", "A1")
+    for _ in range(100):
+        if (tmp_path / "memory.json").exists():
+            break
+        time.sleep(0.01)
+
+    assert threads and threads[0] is not threading.current_thread()
+    assert _memory(tmp_path).stats()["entries"] == 2
@@ -0,0 +1,35 @@
+import pytest
+
+from app import prompts
+from app.prompts import PromptTooLong, check_budget, count_tokens, input_budget, split_to_budget
+
+
+def test_count_tokens_splits_long_words_and_punctuation():
+    # "anticonstitutionnellement" : 25 lettres -> 8 tokens ; "," et "." : 1 chacun
+    assert count_tokens("Le chat, anticonstitutionnellement.") == 1 + 2 + 1 + 8 + 1
+
+
+def test_input_budget_by_level():
+    assert input_budget("A1 (Beginner)") == 500
+    assert input_budget("b2") == 800
+    assert input_budget(None) == input_budget("Z9") == prompts.INPUT_BUDGETS["default"]
+
+
+def test_check_budget(monkeypatch):
+    monkeypatch.setitem(prompts.INPUT_BUDGETS, "A1", 6)
+    assert check_budget("Un deux trois.", "A1 (Beginner)") == 6
+    with pytest.raises(PromptTooLong) as excinfo:
+        check_budget("Un deux trois quatre cinq.", "A1 (Beginner)")
+    assert (excinfo.value.tokens, excinfo.value.budget, excinfo.value.level) == (10, 6, "A1")
+    assert "POST /jobs" in str(excinfo.value)
+
+
+def test_split_to_budget_groups_sentences(monkeypatch):
+    # 4, 4, 5 et 15 tokens
+    monkeypatch.setitem(prompts.INPUT_BUDGETS, "A2", 8)
+    sentences = ["Il pleut.", "Il vente.", "Nous restons.", "Une phrase bien trop longue pour le budget."]
+    assert split_to_budget(sentences, "A2") == [
+        "Il pleut. Il vente.",
+        "Nous restons.",
+        "Une phrase bien trop longue pour le budget.",
+    ]
@@ -0,0 +1,53 @@
+import pytest
+
+from app import routing
+from app.routing import LARGE_MODEL, SMALL_MODEL, choose_model
+
+
+def _analysis(level="A2", tokens=20, hard=0, easy=20):
+    return {
+        "estimated_level": level,
+        "tokens": tokens,
+        "word_difficulty": [
+            {"word": "rare", "count": hard, "difficulty": "hard"},
+            {"word": "simple", "count": easy, "difficulty": "easy"},
+        ],
+    }
+
+
+@pytest.mark.parametrize(
+    "target, analysis, model, reason",
+    [
+        ("A2 (Elementary)", _analysis(), SMALL_MODEL, "short and easy text"),
+        ("C1", _analysis(), LARGE_MODEL, "target C1"),
+        ("A2", _analysis(tokens=81), LARGE_MODEL, "long text (81 tokens)"),
+        ("A2", _analysis(hard=3, easy=17), LARGE_MODEL, "rare vocabulary (15% hard words)"),
+        ("A1", _analysis(level="C1"), LARGE_MODEL, "large level gap (C1 -> A1)"),
+        ("A2", _analysis(level="B2"), SMALL_MODEL, "short and easy text (B2"),
+        (None, _analysis(level="C2"), SMALL_MODEL, "short and easy text (C2"),
+    ],
+)
+def test_choose_model(target, analysis, model, reason):
+    chosen, why = choose_model("texte", target, analysis=analysis)
+    assert chosen == model
+    assert why.startswith(reason)
+
+
+def test_policy_overrides_thresholds():
+    policy = dict(routing.DEFAULT_ROUTING_POLICY, max_words_small=10)
+    assert choose_model("texte", "A2", analysis=_analysis(), policy=policy)[0] == LARGE_MODEL
+
+
+def test_forced_routing(monkeypatch):
+    monkeypatch.setattr(routing, "MODEL_ROUTING", "small")
+    assert choose_model("texte", "C1", analysis=_analysis()) == (
+        SMALL_MODEL, "forced (EDUSIMPLIFY_MODEL_ROUTING=small)"
+    )
+    assert routing.routed_models() == [SMALL_MODEL]
+
+
+def test_lite_engine_analyzes_without_spacy(monkeypatch):
+    monkeypatch.setattr("app.lite.LITE_ENGINE", True)
+    model, reason = choose_model("Le chat dort sur le tapis.", "A2")
+    assert model == SMALL_MODEL
+    assert "short and easy text" in reason
@@ -0,0 +1,123 @@
+import json
+import re
+
+import pytest
+
+from app.lite import apply_lexical_rules_lite, split_long_sentences_lite
+from app.rules import (
+    ADJ_INTENSITY,
+    EASY_CONNECTORS,
+    LEVEL_CONFIG,
+    PHRASAL_SUBSTITUTIONS,
+    apply_rules,
+    elevate_for_c1,
+    get_plan,
+    reload_plans,
+)
+
+TEXTS = [
+    "Cependant, il est nécessaire de partir tôt. Il convient de noter que le comité a effectué "
+    "une analyse approfondie du dossier, et il est impératif de souligner que les résultats "
+    "restent provisoires; par conséquent nous attendrons.",
+    "Je vais à l'école. Le rapport est réalisé par le ministère et le ministère et le ministère.",
+    "Lorsque M. Dupont arriva, afin de dissiper le scepticisme initial, il fit preuve d'empathie. "
+    "Néanmoins, les enjeux majeurs demeuraient!",
+    "TOUTEFOIS le projet Est Analysé Par l'équipe, tandis que la mise en œuvre, en dépit de "
+    "nombreuses difficultés, se poursuit afin que chacun puisse en tirer profit.",
+    "Il est essentiel de lire. « Bonjour ! » Puis il part à 10 h. Il revient (enfin !) Demain.",
+]
+
+MODES = ["strong", "standard", "light"]
+LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+
+
+# Pipeline historique (avant les plans compilés), étape par étape
+def _legacy_connectors(text):
+    out = text
+    for hard, easy in EASY_CONNECTORS.items():
+        def repl(m):
+            return easy.capitalize() if m.group(0)[0].isupper() else easy
+
+        out = re.sub(r"\b" + re.escape(hard) + r"\b", repl, out, flags=re.IGNORECASE)
+    return out
+
+
+def _legacy_patterns(text, target_level):
+    def repl_adj(match):
+        intensity = ADJ_INTENSITY.get(match.group(1).lower(), match.group(1).lower())
+        if target_level in {"B1", "B2"}:
+            return f"C'est {intensity} de"
+        elif target_level in {"A1", "A2"}:
+            return f"C'est {intensity}. On doit"
+        return match.group(0)
+
+    out = re.sub(r"\b[Ii]l est (\w+) de\b", repl_adj, text)
+    if target_level in {"A1", "A2"}:
+        out = re.sub(
+            r"\b[Ee]st (effectué|réalisé|conduit|demandé|étudié|analysé) par\b",
+            "est fait par",
+            out,
+            flags=re.IGNORECASE,
+        )
+    return re.sub(r"(\b\w+\s+)(et)\s+\1", r"\1\2 ", out, flags=re.IGNORECASE)
+
+
+def _legacy_phrasal(text, target_level):
+    if target_level not in {"A1", "A2", "B1"}:
+        return text
+    out = text
+    for hard, easy in PHRASAL_SUBSTITUTIONS.items():
+        out = re.sub(r"\b" + re.escape(hard) + r"\b", easy, out, flags=re.IGNORECASE)
+    return out
+
+
+def _legacy_pipeline(text, mode, level, max_len):
+    out = _legacy_connectors(text)
+    out = _legacy_patterns(out, level)
+    out = _legacy_phrasal(out, level)
+    if mode == "strong":
+        out = apply_lexical_rules_lite(out, level)
+    if mode in {"standard", "strong"}:
+        out = split_long_sentences_lite(out, max_len=max_len)
+    if level == "C1":
+        out = elevate_for_c1(out)
+    return out.strip()
+
+
+@pytest.mark.parametrize("level", sorted(LEVEL_CONFIG))
+def test_level_plans_match_legacy_pipeline(level):
+    conf = LEVEL_CONFIG[level]
+    for text in TEXTS:
+        expected = _legacy_pipeline(text, conf["mode"], level, conf["max_len"])
+        assert apply_rules(text, conf["mode"], level, conf["max_len"], engine="lite") == expected
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize("level", LEVELS)
+def test_fallback_plans_match_legacy_pipeline(mode, level):
+    for text in TEXTS:
+        assert apply_rules(text, mode, level, 12, engine="lite") == _legacy_pipeline(text, mode, level, 12)
+
+
+def test_plans_only_keep_useful_stages():
+    assert get_plan("lite", "strong", "A1", 8).stage_names == [
+        "connectors", "patterns", "phrasal", "lexical", "split",
+    ]
+    assert get_plan("lite", "light", "C1", 30).stage_names == ["connectors", "patterns", "c1"]
+    assert get_plan("lite", "standard", "B2", 22).stage_names == ["connectors", "patterns", "split"]
+
+
+def test_rules_file_overrides_and_invalid_file_keeps_rules(tmp_path, capsys):
+    rules_file = tmp_path / "rules.json"
+    rules_file.write_text(json.dumps({"connectors": {"pourtant": "mais"}}), encoding="utf-8")
+    try:
+        assert reload_plans(str(rules_file))
+        assert apply_rules("Pourtant il pleut.", "light", "B2", 30, engine="lite") == "Mais il pleut."
+
+        rules_file.write_text("{invalide", encoding="utf-8")
+        assert not reload_plans(str(rules_file))
+        assert "[RULES ERROR]" in capsys.readouterr().out
+        assert apply_rules("Pourtant il pleut.", "light", "B2", 30, engine="lite") == "Mais il pleut."
+    finally:
+        reload_plans()
+    assert apply_rules("Pourtant il pleut.", "light", "B2", 30, engine="lite") == "Pourtant il pleut."
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from app.structured import SIMPLIFY_SCHEMA, IncrementalJSONParser, missing_required, parse_tolerant
+
+COMPLETE = {"detected_level": "B2", "simplified_text": "Le chat dort.", "notes": ["a", "b"]}
+
+
+def test_plain_json():
+    assert parse_tolerant(json.dumps(COMPLETE)) == COMPLETE
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [
+        "Voici le résultat :\n" + json.dumps(COMPLETE) + "\nBonne lecture !",
+        "```json\n" + json.dumps(COMPLETE) + "\n```",
+    ],
+)
+def test_prose_and_fences_around_object(raw):
+    assert parse_tolerant(raw) == COMPLETE
+
+
+def test_truncated_output_keeps_complete_fields():
+    raw = '{"detected_level": "B2", "simplified_text": "Le chat dort.", "notes": ["a", "b'
+    data = parse_tolerant(raw)
+    assert data["detected_level"] == "B2"
+    assert data["simplified_text"] == "Le chat dort."
+    assert not missing_required(data, SIMPLIFY_SCHEMA)
+
+
+def test_truncated_string_value_is_dropped():
+    data = parse_tolerant('{"detected_level": "B2", "simplified_text": "Le ch')
+    assert data["detected_level"] == "B2"
+    assert data.get("simplified_text") is None
+    assert missing_required(data, SIMPLIFY_SCHEMA) == ["simplified_text"]
+
+
+def test_braces_inside_strings_are_ignored():
+    raw = '{"simplified_text": "un { et un }", "detected_level": "A2"} suite'
+    assert parse_tolerant(raw) == {"simplified_text": "un { et un }", "detected_level": "A2"}
+
+
+def test_invalid_json_falls_back_to_string_fields():
+    raw = '{"detected_level": "B1", "simplified_text": "Il pleut.", "score": 0.5.3}'
+    data = parse_tolerant(raw)
+    assert data["detected_level"] == "B1"
+    assert data["simplified_text"] == "Il pleut."
+
+
+@pytest.mark.parametrize("raw", ["", None, "pas de JSON ici", "[1, 2, 3]"])
+def test_nothing_usable(raw):
+    assert parse_tolerant(raw) == {}
+
+
+def test_blank_required_field_is_missing():
+    assert missing_required({"detected_level": "B1", "simplified_text": "  "}, SIMPLIFY_SCHEMA) == [
+        "simplified_text"
+    ]
+
+
+def test_incremental_parser_stops_when_object_closes():
+    parser = IncrementalJSONParser(SIMPLIFY_SCHEMA)
+    chunks = ['{"detected_level": "B1", ', '"simplified_text": "Il {pleut}."', "}", " et du texte"]
+    complete = [parser.feed(c) for c in chunks[:3]]
+    assert complete == [False, False, True]
+    assert parser.snapshot()["simplified_text"] == "Il {pleut}."
+    assert parser.missing() == []
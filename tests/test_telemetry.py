@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from app import telemetry
+
+RESPONSE = {"prompt_eval_count": 100, "eval_count": 40, "eval_duration": 2 * 10**9}
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    """Compteurs vides, propres au test."""
+    monkeypatch.setattr(telemetry, "_counters", {})
+    monkeypatch.setattr(telemetry, "_histograms", {})
+    monkeypatch.setattr(telemetry, "_gauges", {"process_resident_memory_bytes": lambda: 100})
+    monkeypatch.setattr(telemetry, "METRICS_DIR", "")
+
+
+def test_workers_share_their_counters(metrics, tmp_path):
+    telemetry.share_metrics(str(tmp_path))
+    telemetry.record_llm_call(RESPONSE, "m", "A2", "/api/generate", 1.0)
+
+    # un autre worker, vivant (le processus parent du test)...
+    other = json.loads((tmp_path / f"{os.getpid()}.json").read_text())
+    other["gauges"] = {"process_resident_memory_bytes": 200}
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(other))
+    # ... et un worker relancé depuis, dont seuls les compteurs comptent
+    (tmp_path / "999999999.json").write_text(json.dumps(other))
+
+    text = telemetry.render_metrics()
+    assert 'llm_requests_total{model="m",target_level="A2"} 3' in text
+    assert 'llm_output_tokens_count{model="m",target_level="A2"} 3' in text
+    assert f'process_resident_memory_bytes{{pid="{os.getpid()}"}} 100' in text
+    assert f'process_resident_memory_bytes{{pid="{os.getppid()}"}} 200' in text
+    assert 'pid="999999999"' not in text
+
+
+def test_batched_call_logs_every_request_id(metrics, monkeypatch):
+    lines = []
+    monkeypatch.setattr(telemetry.logger, "info", lines.append)
+    token = telemetry.batch_request_ids_var.set(["r1", "r2"])
+    try:
+        telemetry.record_llm_call(RESPONSE, "m", "A2", "/api/generate", 1.0)
+    finally:
+        telemetry.batch_request_ids_var.reset(token)
+
+    line = json.loads(lines[-1])
+    assert line["request_id"] is None
+    assert line["request_ids"] == ["r1", "r2"]
+
+
+def test_llm_stats_converts_nanoseconds():
+    stats = telemetry.llm_stats(dict(RESPONSE, load_duration=10**9))
+    assert stats["eval_seconds"] == 2.0
+    assert stats["tokens_per_second"] == 20.0
+    assert stats["model_loaded"] is True
+    assert telemetry.llm_stats({})["tokens_per_second"] is None
+
+
+def test_histograms_are_cumulative_and_levels_bounded(metrics):
+    telemetry.record_llm_call(RESPONSE, "m", "a2 (Elementary)", "/api/generate", 1.0)
+    telemetry.record_llm_call(dict(RESPONSE, eval_count=600), "m", "Z9", "/api/generate", 1.0)
+    text = telemetry.render_metrics()
+
+    assert 'llm_output_tokens_bucket{model="m",target_level="A2",le="32"} 0' in text
+    assert 'llm_output_tokens_bucket{model="m",target_level="A2",le="64"} 1' in text
+    assert 'llm_output_tokens_bucket{model="m",target_level="A2",le="+Inf"} 1' in text
+    assert 'llm_output_tokens_sum{model="m",target_level="A2"} 40' in text
+    # niveau inconnu fourni par le client : une seule série "other"
+    assert 'llm_output_tokens_bucket{model="m",target_level="other",le="1024"} 1' in text
+    assert "process_resident_memory_bytes 100" in text
+
+
+def test_request_id_middleware_sets_and_returns_the_id():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(telemetry.request_id_var.get())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def request(headers):
+        await telemetry.RequestIdMiddleware(app)({"type": "http", "headers": headers}, None, send)
+
+    asyncio.run(request([(b"x-request-id", b"abc")]))
+    asyncio.run(request([]))
+
+    assert seen[0] == "abc"
+    assert len(seen[1]) == 32
+    assert [dict(m["headers"])[b"x-request-id"] for m in sent] == [b"abc", seen[1].encode()]
+    # rien ne fuit hors de la requête
+    assert telemetry.request_id_var.get() is None